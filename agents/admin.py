@@ -1,13 +1,51 @@
 from django.contrib import admin
-from django.utils.html import format_html
+from django.core.cache import cache
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Substr
+from django.http import Http404, HttpResponse
+from django.urls import path, reverse
+from django.utils.html import escape, format_html
 from django.utils.safestring import mark_safe
-from .models import AgentSession, AgentMessage, AgentCapability
+from .models import AgentSession, AgentMessage, AgentToolResult, AgentReasoningStep, AgentPlanCache, AgentCompletionCache, AgentCapability
 import json
 
+try:
+    import orjson
+    orjson_available = True
+except ImportError:
+    orjson = None
+    orjson_available = False
+
+
+# Larger contexts are cut off on the change form and linked to the full JSON view
+CONTEXT_DISPLAY_LIMIT = 64 * 1024
+CONTEXT_CACHE_TIMEOUT = 3600
+
+# Pre-built wrappers so previews are escaped and concatenated without reparsing a format string
+MESSAGE_PREVIEW_PREFIXES = {
+    'tool': mark_safe('<span style="color: blue; font-family: monospace;">'),
+    'agent': mark_safe('<span style="color: green;">'),
+    'user': mark_safe('<span style="color: purple;">'),
+}
+MESSAGE_PREVIEW_SUFFIX = mark_safe('</span>')
+
+
+def _is_changelist(request):
+    """True when the request is for an admin changelist page."""
+    match = getattr(request, 'resolver_match', None)
+    return bool(match and match.url_name and match.url_name.endswith('_changelist'))
+
+
+def _pretty_json(value):
+    """Indent a JSON-serializable value for display, using orjson when installed"""
+    if orjson_available:
+        return orjson.dumps(value, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(value, indent=2)
+
 
 @admin.register(AgentSession)
 class AgentSessionAdmin(admin.ModelAdmin):
-    list_display = ['session_id', 'task_status', 'current_task_preview', 'message_count', 'created_at', 'updated_at']
+    list_display = ['session_id', 'task_status', 'current_task_preview', 'message_count', 'tool_result_count', 'created_at', 'updated_at']
     list_filter = ['task_status', 'created_at', 'updated_at']
     search_fields = ['session_id', 'current_task']
     readonly_fields = ['created_at', 'updated_at', 'context_display']
@@ -25,20 +63,93 @@ class AgentSessionAdmin(admin.ModelAdmin):
         })
     )
     
+    def get_queryset(self, request):
+        # Scalar subquery rather than a JOIN so the count can't be multiplied by other joins
+        message_counts = (
+            AgentMessage.objects.filter(session=OuterRef('pk'))
+            .order_by()
+            .values('session')
+            .annotate(c=Count('*'))
+            .values('c')
+        )
+        tool_result_counts = (
+            AgentToolResult.objects.filter(session=OuterRef('pk'))
+            .order_by()
+            .values('session')
+            .annotate(c=Count('*'))
+            .values('c')
+        )
+        queryset = super().get_queryset(request).annotate(
+            _message_count=Coalesce(Subquery(message_counts), 0),
+            _tool_result_count=Coalesce(Subquery(tool_result_counts), 0),
+            _task_preview=Substr('current_task', 1, 51)
+        )
+        if _is_changelist(request):
+            # Large text/JSON columns stay in the database; the preview only needs a prefix
+            queryset = queryset.defer('context', 'current_task')
+        return queryset
+    
     def current_task_preview(self, obj):
-        if obj.current_task:
-            return obj.current_task[:50] + "..." if len(obj.current_task) > 50 else obj.current_task
+        head = getattr(obj, '_task_preview', None)
+        if head is None:
+            head = obj.current_task[:51]
+        if head:
+            return head[:50] + "..." if len(head) > 50 else head
         return "-"
     current_task_preview.short_description = 'Task Preview'
     
     def message_count(self, obj):
-        return obj.messages.count()
+        # Annotated by get_queryset; count once per instance for objects loaded elsewhere
+        if not hasattr(obj, '_message_count'):
+            obj._message_count = obj.messages.count()
+        return obj._message_count
     message_count.short_description = 'Messages'
+    message_count.admin_order_field = '_message_count'
+    
+    def tool_result_count(self, obj):
+        if not hasattr(obj, '_tool_result_count'):
+            obj._tool_result_count = obj.tool_results.count()
+        return obj._tool_result_count
+    tool_result_count.short_description = 'Tool Results'
+    tool_result_count.admin_order_field = '_tool_result_count'
+    
+    def _formatted_context(self, obj):
+        """Pretty-printed context, cached until the session is next saved"""
+        key = f'agents:ctx:{obj.pk}:{obj.updated_at.timestamp()}'
+        formatted = cache.get(key)
+        if formatted is None:
+            formatted = _pretty_json(obj.context)
+            cache.set(key, formatted, CONTEXT_CACHE_TIMEOUT)
+        return formatted
+    
+    def get_urls(self):
+        custom_urls = [
+            path(
+                '<path:object_id>/context/',
+                self.admin_site.admin_view(self.context_view),
+                name='agents_agentsession_context',
+            ),
+        ]
+        return custom_urls + super().get_urls()
+    
+    def context_view(self, request, object_id):
+        """Serve the full session context as JSON for contexts too large to inline"""
+        obj = self.get_object(request, object_id)
+        if obj is None or not self.has_view_permission(request, obj):
+            raise Http404
+        return HttpResponse(self._formatted_context(obj), content_type='application/json')
     
     def context_display(self, obj):
         if obj.context:
             try:
-                formatted = json.dumps(obj.context, indent=2)
+                formatted = self._formatted_context(obj)
+                if len(formatted) > CONTEXT_DISPLAY_LIMIT:
+                    full_url = reverse('admin:agents_agentsession_context', args=[obj.pk])
+                    return format_html(
+                        '<pre style="background: #f8f9fa; padding: 10px; max-height: 400px; overflow-y: auto;">{}\n... truncated</pre>'
+                        '<a href="{}" target="_blank">View full context ({} KB)</a>',
+                        formatted[:CONTEXT_DISPLAY_LIMIT], full_url, len(formatted) // 1024
+                    )
                 return format_html('<pre style="background: #f8f9fa; padding: 10px; max-height: 400px; overflow-y: auto;">{}</pre>', formatted)
             except:
                 return str(obj.context)
@@ -50,7 +161,9 @@ class AgentSessionAdmin(admin.ModelAdmin):
 class AgentMessageAdmin(admin.ModelAdmin):
     list_display = ['session', 'message_type', 'content_preview', 'timestamp']
     list_filter = ['message_type', 'timestamp', 'session__task_status']
+    list_select_related = ('session',)
     search_fields = ['content', 'session__session_id']
+    raw_id_fields = ('session',)
     readonly_fields = ['timestamp', 'metadata_display']
     
     fieldsets = (
@@ -66,21 +179,28 @@ class AgentMessageAdmin(admin.ModelAdmin):
         })
     )
     
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request).select_related('session')
+        if _is_changelist(request):
+            # metadata is only shown on the detail form; skip it (and the session's context) for list rows
+            queryset = queryset.only(
+                'id', 'session', 'session__session_id', 'message_type', 'content', 'timestamp'
+            )
+        return queryset
+    
     def content_preview(self, obj):
-        preview = obj.content[:100] + "..." if len(obj.content) > 100 else obj.content
-        if obj.message_type == 'tool':
-            return format_html('<span style="color: blue; font-family: monospace;">{}</span>', preview)
-        elif obj.message_type == 'agent':
-            return format_html('<span style="color: green;">{}</span>', preview)
-        elif obj.message_type == 'user':
-            return format_html('<span style="color: purple;">{}</span>', preview)
-        return preview
+        head = obj.content[:101]
+        preview = head[:100] + "..." if len(head) > 100 else head
+        prefix = MESSAGE_PREVIEW_PREFIXES.get(obj.message_type)
+        if prefix is None:
+            return preview
+        return prefix + escape(preview) + MESSAGE_PREVIEW_SUFFIX
     content_preview.short_description = 'Content Preview'
     
     def metadata_display(self, obj):
         if obj.metadata:
             try:
-                formatted = json.dumps(obj.metadata, indent=2)
+                formatted = _pretty_json(obj.metadata)
                 return format_html('<pre style="background: #f8f9fa; padding: 10px; max-height: 300px; overflow-y: auto;">{}</pre>', formatted)
             except:
                 return str(obj.metadata)
@@ -88,6 +208,46 @@ class AgentMessageAdmin(admin.ModelAdmin):
     metadata_display.short_description = 'Metadata (JSON)'
 
 
+@admin.register(AgentToolResult)
+class AgentToolResultAdmin(admin.ModelAdmin):
+    list_display = ['session', 'idx', 'tool_name', 'success', 'iteration', 'created_at']
+    list_filter = ['success', 'created_at']
+    list_select_related = ('session',)
+    search_fields = ['session__session_id']
+    raw_id_fields = ('session',)
+    readonly_fields = ['created_at']
+    
+    def tool_name(self, obj):
+        return obj.action.get('action', 'unknown')
+    tool_name.short_description = 'Tool'
+
+
+@admin.register(AgentReasoningStep)
+class AgentReasoningStepAdmin(admin.ModelAdmin):
+    list_display = ['session', 'iteration', 'action', 'created_at']
+    list_filter = ['action', 'created_at']
+    list_select_related = ('session',)
+    search_fields = ['session__session_id', 'reasoning']
+    raw_id_fields = ('session',)
+    readonly_fields = ['created_at']
+
+
+@admin.register(AgentPlanCache)
+class AgentPlanCacheAdmin(admin.ModelAdmin):
+    list_display = ['user_request', 'hit_count', 'created_at']
+    list_filter = ['created_at']
+    search_fields = ['user_request', 'key']
+    readonly_fields = ['key', 'hit_count', 'created_at']
+
+
+@admin.register(AgentCompletionCache)
+class AgentCompletionCacheAdmin(admin.ModelAdmin):
+    list_display = ['key', 'created_at']
+    list_filter = ['created_at']
+    search_fields = ['key']
+    readonly_fields = ['key', 'created_at']
+
+
 @admin.register(AgentCapability)
 class AgentCapabilityAdmin(admin.ModelAdmin):
     list_display = ['name', 'data_sources_count', 'templates_count', 'is_active', 'created_at']
@@ -115,10 +275,27 @@ class AgentCapabilityAdmin(admin.ModelAdmin):
         })
     )
     
+    def get_queryset(self, request):
+        # distinct=True keeps the two M2M joins from multiplying each other's counts
+        queryset = super().get_queryset(request).annotate(
+            _data_sources_count=Count('data_sources', distinct=True),
+            _templates_count=Count('preferred_templates', distinct=True)
+        )
+        if _is_changelist(request):
+            # The change form edits these fields, so they're only skipped for list rows
+            queryset = queryset.defer('system_prompt', 'example_usage', 'description')
+        return queryset
+    
     def data_sources_count(self, obj):
-        return obj.data_sources.count()
+        if not hasattr(obj, '_data_sources_count'):
+            obj._data_sources_count = obj.data_sources.count()
+        return obj._data_sources_count
     data_sources_count.short_description = 'Data Sources'
+    data_sources_count.admin_order_field = '_data_sources_count'
     
     def templates_count(self, obj):
-        return obj.preferred_templates.count()
+        if not hasattr(obj, '_templates_count'):
+            obj._templates_count = obj.preferred_templates.count()
+        return obj._templates_count
     templates_count.short_description = 'Templates'
+    templates_count.admin_order_field = '_templates_count'
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class AgentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'agents'
+    
+    def ready(self):
+        import agents.signals
+        from agents.tools import tool_registry
+        
+        # Build the registry and its prompt description at startup, not on the first request
+        tool_registry.get_tools_description()
@@ -0,0 +1,242 @@
+"""
+Prompt context blocks describing the configured data sources and HTML templates.
+
+Building them takes several queries and a lot of string assembly, and they only
+change when a DataSource or HTMLTemplate is edited, so the results are cached
+under a version number that agents.signals bumps on every save or delete.
+"""
+import time
+
+from django.core.cache import cache
+
+CONTEXT_CACHE_TIMEOUT = 300
+CONTEXT_VERSION_KEY = 'agent:ctx_version'
+
+# Per-process copies: cache key prefix -> (version, fetched_at, text)
+_process_contexts = {}
+
+
+# Everything but the template count is fixed, so the text is joined once at import
+TEMPLATES_CONTEXT_LINES = [
+    "🎯 ALL COMMON LIBRARIES ARE PRE-LOADED:",
+    "=" * 50,
+    "Every template includes ALL major libraries ready to use:",
+    "",
+    "✅ LEAFLET (Maps): Use L.map(), L.marker(), etc. directly",
+    "✅ CHART.JS (Charts): Use new Chart() directly", 
+    "✅ BOOTSTRAP (Styling): All CSS classes & JS components available",
+    "✅ FONT AWESOME (Icons): Use <i class='fas fa-icon'></i>",
+    "",
+    "📋 {template_count} templates available:",
+    "• Enhanced Map Template (map layouts with utility functions)",
+    "• Enhanced Dashboard Template (dashboard layouts with metrics)",
+    "• Comprehensive Template (flexible general-purpose layout)",
+    "",
+    "=" * 50,
+    "🚨 CRITICAL: Libraries are ALREADY loaded - DON'T add <script> or <link> tags!",
+    "• Use L.map('elementId') for maps (Leaflet ready)",
+    "• Use new Chart(ctx, config) for charts (Chart.js ready)",
+    "• Use Bootstrap classes like 'container', 'btn', 'card' (Bootstrap ready)",
+    "• All templates include utility functions: createMap(), createChart(), showLoading()",
+]
+TEMPLATES_CONTEXT = "\n".join(TEMPLATES_CONTEXT_LINES)
+
+
+def _context_version() -> int:
+    return cache.get_or_set(CONTEXT_VERSION_KEY, time.time_ns, None)
+
+
+def invalidate_contexts():
+    """Retire all cached context strings; the next lookup rebuilds them"""
+    try:
+        cache.incr(CONTEXT_VERSION_KEY)
+    except ValueError:
+        # Version key was evicted - start a fresh one that can't collide with old entries
+        cache.set(CONTEXT_VERSION_KEY, time.time_ns(), None)
+
+
+def _get_context(prefix: str, builder) -> str:
+    """
+    Context value for the current version. The last one fetched is also kept in process,
+    so agents share one object instead of each unpickling a copy from the cache.
+    """
+    version = _context_version()
+    now = time.monotonic()
+    local = _process_contexts.get(prefix)
+    if local and local[0] == version and now - local[1] < CONTEXT_CACHE_TIMEOUT:
+        return local[2]
+
+    text = cache.get_or_set(f'{prefix}:{version}', builder, CONTEXT_CACHE_TIMEOUT)
+    _process_contexts[prefix] = (version, now, text)
+    return text
+
+
+def get_data_sources_context() -> str:
+    """Cached data sources context for agent prompts"""
+    return _get_context('agent:ds_ctx', _build_data_sources_context)
+
+
+def get_templates_context() -> str:
+    """Cached HTML templates context for agent prompts"""
+    return _get_context('agent:tpl_ctx', _build_templates_context)
+
+
+def get_datasets_context() -> str:
+    """Cached data sources summary for the single-call LLMService prompt"""
+    return _get_context('agent:datasets_ctx', _build_datasets_context)
+
+
+def get_stac_collections() -> list:
+    """Cached, sorted IDs of the collections offered by active STAC data sources"""
+    return _get_context('agent:stac_collections', _build_stac_collections)
+
+
+def _build_data_sources_context() -> str:
+    """Get available data sources context with strong priority emphasis"""
+    from datasets.models import DataSource
+
+    # Evaluate once: the loop and the totals below reuse the same rows. Only load the
+    # columns read here and by is_stac_catalog()/get_stac_search_url()/get_available_collections()
+    active_sources = list(
+        DataSource.objects.filter(is_active=True)
+        .only('id', 'category', 'name', 'description', 'llm_context',
+              'data_type', 'base_url', 'stac_catalog_url', 'stac_collections')
+        .order_by('category', 'name')
+    )
+
+    if not active_sources:
+        return "No configured data sources available."
+
+    context_parts = [
+        "🎯 PRIORITY DATA SOURCES - USE THESE FIRST:",
+        "=" * 50,
+        "These are CONFIGURED, VALIDATED data sources that should be your PRIMARY choice.",
+        "Only use external sources if these don't have the needed data.",
+    ]
+
+    category_labels = dict(DataSource.CATEGORY_CHOICES)
+    current_category = None
+    total_collections = 0
+
+    for source in active_sources:
+        if source.category != current_category:
+            current_category = source.category
+            category_name = category_labels.get(source.category, source.category)
+            context_parts.append(f"\n📊 {category_name.upper()}:")
+
+        context_parts.append(f"✅ {source.name}: {source.description}")
+
+        if source.is_stac_catalog():
+            # Sorted so the prompt text (and OpenAI's cached prefix) doesn't depend on JSON key order
+            collections = sorted(source.get_available_collections())
+            total_collections += len(collections)
+
+            context_parts.append(f"   🔗 STAC Search URL: {source.get_stac_search_url()}")
+            context_parts.append(f"   📋 Available Collections ({len(collections)} total):")
+
+            # Group collections by type and show them more descriptively
+            collection_groups = {'events': [], 'hazards': [], 'impacts': [], 'other': []}
+            for collection in collections:
+                lowered = collection.lower()
+                matched = False
+                if 'events' in lowered:
+                    collection_groups['events'].append(collection)
+                    matched = True
+                if 'hazard' in lowered:
+                    collection_groups['hazards'].append(collection)
+                    matched = True
+                if 'impact' in lowered:
+                    collection_groups['impacts'].append(collection)
+                    matched = True
+                if not matched:
+                    collection_groups['other'].append(collection)
+
+            for group_name, group_collections in collection_groups.items():
+                if group_collections:
+                    context_parts.append(f"     📊 {group_name.title()}: {', '.join(group_collections[:3])}")
+                    if len(group_collections) > 3:
+                        context_parts.append(f"         ... and {len(group_collections) - 3} more {group_name}")
+
+            # Add specific usage examples with real collection names
+            example_collections = collections[:2]
+            context_parts.append(f"   💡 Usage Examples:")
+            for coll in example_collections:
+                context_parts.append(f"     • fetch_stac_sample_data(collection='{coll}', limit=3)")
+
+            context_parts.append(f"   ⚡ PRIORITY: Always fetch sample data from these collections FIRST")
+
+        if source.llm_context:
+            context_parts.append(f"   📝 Context: {source.llm_context}")
+
+    context_parts.extend([
+        "",
+        "=" * 50,
+        f"🚨 CRITICAL: These {len(active_sources)} configured sources contain {total_collections} data collections.",
+        "ALWAYS check these sources BEFORE searching for external alternatives.",
+        "Use 'fetch_stac_sample_data' tool to get real data structure and examples."
+    ])
+
+    return "\n".join(context_parts)
+
+
+def _build_datasets_context() -> str:
+    """Get rich context about available datasets for LLM prompt"""
+    from datasets.models import DataSource
+
+    # Evaluate once instead of exists() plus iteration, loading only the columns read
+    # here and by get_llm_context_summary()
+    active_sources = list(
+        DataSource.objects.filter(is_active=True)
+        .only('id', 'category', 'name', 'description', 'data_type', 'llm_context', 'stac_collections',
+              'spatial_extent', 'temporal_extent', 'update_frequency', 'query_patterns')
+        .order_by('category', 'name')
+    )
+
+    if not active_sources:
+        return "No configured data sources available. Please configure DataSources first."
+
+    context_parts = ["AVAILABLE DATA SOURCES (integrate these real APIs):"]
+
+    category_labels = dict(DataSource.CATEGORY_CHOICES)
+    current_category = None
+    for source in active_sources:
+        if source.category != current_category:
+            current_category = source.category
+            category_name = category_labels.get(source.category, source.category)
+            context_parts.append(f"\n**{category_name.upper()}:**")
+
+        # Get the detailed LLM context for each source
+        source_context = source.get_llm_context_summary()
+        context_parts.append(f"• {source_context}")
+
+        # Add query patterns if available
+        if source.query_patterns:
+            context_parts.append("  Query patterns:")
+            for pattern in source.query_patterns[:2]:  # Limit to first 2 patterns
+                context_parts.append(f"    - {pattern.get('name', 'Query')}: {pattern.get('template', '')}")
+
+        context_parts.append("")  # Empty line for readability
+
+    return "\n".join(context_parts)
+
+
+def _build_stac_collections() -> list:
+    from datasets.models import DataSource
+
+    collections = set()
+    for stac_collections in DataSource.objects.filter(is_active=True, data_type='stac_catalog').values_list('stac_collections', flat=True):
+        if stac_collections:
+            collections.update(stac_collections.keys())
+    return sorted(collections)
+
+
+def _build_templates_context() -> str:
+    """Get available HTML templates and their pre-loaded libraries"""
+    from generator.models import HTMLTemplate
+
+    template_count = HTMLTemplate.objects.filter(is_active=True).count()
+
+    if not template_count:
+        return "No HTML templates available - will generate from scratch."
+
+    return TEMPLATES_CONTEXT.format(template_count=template_count)
@@ -0,0 +1,149 @@
+"""
+JSON helpers for LLM replies and stored agent state.
+
+orjson is used when it is installed; the stdlib json module is the fallback.
+orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers can keep
+catching the stdlib exception.
+"""
+import json
+
+try:
+    import orjson
+    orjson_available = True
+except ImportError:
+    orjson = None
+    orjson_available = False
+
+
+def loads(data):
+    """Parse a JSON document"""
+    if orjson_available:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(value) -> str:
+    """Serialize a value to compact JSON text"""
+    if orjson_available:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+
+
+def find_json_object(text: str) -> str:
+    """
+    Return the first balanced {...} object in text, skipping markdown fences or
+    prose around it. Braces inside JSON strings are ignored.
+    """
+    start = text.find('{')
+    if start == -1:
+        return text.strip()
+
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+
+    # Unbalanced (e.g. truncated reply) - let the parser report the error
+    return text[start:]
+
+
+class JSONObjectTracker:
+    """
+    Incremental counterpart of find_json_object for streamed replies: feed() text
+    chunks as they arrive and it reports when the first top-level object has closed.
+    With capture_fields, top-level string fields are also collected as soon as their
+    closing quote arrives; take_fields() returns the (key, value) pairs completed so far.
+    """
+
+    def __init__(self, capture_fields: bool = False):
+        self.depth = 0
+        self.started = False
+        self.in_string = False
+        self.escaped = False
+        self.closed = False
+        self.capture_fields = capture_fields
+        self.fields = []
+        self._key = None
+        self._expect_value = False
+        self._string_parts = None
+
+    def feed(self, chunk: str) -> bool:
+        """Consume a chunk; returns True once the top-level object is complete"""
+        if self.closed:
+            return True
+        for char in chunk:
+            if self.in_string:
+                if self._string_parts is not None:
+                    self._string_parts.append(char)
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                    if self._string_parts is not None:
+                        self._end_top_level_string()
+            elif not self.started:
+                if char == '{':
+                    self.started = True
+                    self.depth = 1
+            elif char == '"':
+                self.in_string = True
+                if self.capture_fields and self.depth == 1:
+                    self._string_parts = ['"']
+            elif char in '{[':
+                self.depth += 1
+            elif char in '}]':
+                self.depth -= 1
+                if self.depth == 0:
+                    self.closed = True
+                    return True
+            elif self.depth == 1 and char in ':,':
+                self._expect_value = char == ':'
+        return False
+
+    def _end_top_level_string(self):
+        text = loads(''.join(self._string_parts))
+        self._string_parts = None
+        if self._expect_value:
+            self.fields.append((self._key, text))
+            self._expect_value = False
+        else:
+            self._key = text
+
+    def take_fields(self) -> list:
+        """Return and clear the top-level string fields completed since the last call"""
+        fields, self.fields = self.fields, []
+        return fields
+
+
+def extract_json(text: str):
+    """
+    Parse the JSON object in an LLM reply, tolerating ```json fences and surrounding text.
+    Raises json.JSONDecodeError when no valid object is found.
+    """
+    start = text.find('{')
+    end = text.rfind('}')
+    if start != -1 and end > start:
+        # Common case: a single object, possibly fenced - no character scan needed
+        try:
+            return loads(text[start:end + 1])
+        except json.JSONDecodeError:
+            pass
+    return loads(find_json_object(text))
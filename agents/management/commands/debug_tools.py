@@ -1,7 +1,42 @@
-from django.core.management.base import BaseCommand
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Func, JSONField, OuterRef, Prefetch, Subquery, TextField, Value
+from django.db.models.functions import Cast, Coalesce
 from agents.tools import tool_registry
-from agents.models import AgentSession
+from agents.models import AgentSession, AgentMessage, AgentToolResult
 import json
+import time
+
+
+class JSONRemoveKey(Func):
+    """A JSON object column with one top-level key stripped out by the database"""
+    function = 'JSON_REMOVE'
+    output_field = JSONField()
+    
+    def __init__(self, expression, key, **extra):
+        self.key = key
+        super().__init__(expression, Value(f'$.{key}'), **extra)
+    
+    def as_postgresql(self, compiler, connection, **extra_context):
+        clone = self.copy()
+        clone.set_source_expressions([self.get_source_expressions()[0], Cast(Value(self.key), TextField())])
+        return clone.as_sql(compiler, connection, template='(%(expressions)s)', arg_joiner=' - ', **extra_context)
+
+
+# Seconds to wait for each tool when testing tools
+TOOL_TEST_TIMEOUT = 30
+
+
+def session_row_count(model):
+    """Per-session row count of model as a scalar subquery, so counts can't multiply across joins"""
+    counts = (
+        model.objects.filter(session=OuterRef('pk'))
+        .order_by()
+        .values('session')
+        .annotate(c=Count('*'))
+        .values('c')
+    )
+    return Coalesce(Subquery(counts), 0)
 
 
 class Command(BaseCommand):
@@ -18,47 +53,70 @@ class Command(BaseCommand):
             type=str,
             help='Debug specific agent session'
         )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            help='Only list the first N tool results when debugging a session'
+        )
 
     def handle(self, *args, **options):
+        if options['limit'] is not None and options['limit'] <= 0:
+            raise CommandError('--limit must be a positive number')
+        
         if options['test_tools']:
             self.test_tools()
         
         if options['session_id']:
-            self.debug_session(options['session_id'])
+            self.debug_session(options['session_id'], options['limit'])
         
         if not options['test_tools'] and not options['session_id']:
             self.show_available_tools()
             self.show_recent_sessions()
 
     def show_available_tools(self):
-        self.stdout.write(self.style.SUCCESS('AVAILABLE TOOLS:'))
-        self.stdout.write('=' * 50)
+        # Collect output and write it once rather than once per line
+        lines = [
+            self.style.SUCCESS('AVAILABLE TOOLS:'),
+            '=' * 50,
+        ]
         
         tools = tool_registry.get_available_tools()
         for tool_name, tool_class in tools.items():
-            self.stdout.write(f'{tool_name}: {tool_class.description}')
+            lines.append(f'{tool_name}: {tool_class.description}')
         
-        self.stdout.write(f'\nTotal tools available: {len(tools)}')
+        lines.append(f'\nTotal tools available: {len(tools)}')
+        self.stdout.write('\n'.join(lines))
 
     def show_recent_sessions(self):
-        self.stdout.write('\n' + self.style.SUCCESS('RECENT AGENT SESSIONS:'))
-        self.stdout.write('=' * 50)
+        lines = [
+            '\n' + self.style.SUCCESS('RECENT AGENT SESSIONS:'),
+            '=' * 50,
+        ]
         
-        sessions = AgentSession.objects.all().order_by('-created_at')[:5]
+        first_results = AgentToolResult.objects.filter(idx__lt=3).only('session_id', 'idx', 'action')
+        sessions = (
+            AgentSession.objects.annotate(
+                message_count=session_row_count(AgentMessage),
+                tool_result_count=session_row_count(AgentToolResult)
+            )
+            .prefetch_related(Prefetch('tool_results', queryset=first_results, to_attr='first_tool_results'))
+            .order_by('-created_at')[:5]
+        )
         for session in sessions:
-            self.stdout.write(f'Session: {session.session_id}')
-            self.stdout.write(f'  Status: {session.task_status}')
-            self.stdout.write(f'  Created: {session.created_at}')
-            self.stdout.write(f'  Context keys: {list(session.context.keys()) if session.context else []}')
+            lines.append(f'Session: {session.session_id}')
+            lines.append(f'  Status: {session.task_status}')
+            lines.append(f'  Created: {session.created_at}')
+            lines.append(f'  Messages: {session.message_count}')
+            lines.append(f'  Context keys: {list(session.context.keys()) if session.context else []}')
             
-            if session.context and 'tool_results' in session.context:
-                tool_results = session.context.get('tool_results', [])
-                self.stdout.write(f'  Tool results: {len(tool_results)}')
-                for i, result in enumerate(tool_results[:3], 1):
-                    action = result.get('action', {})
-                    self.stdout.write(f'    {i}. {action.get("action", "unknown")}')
+            if session.tool_result_count:
+                lines.append(f'  Tool results: {session.tool_result_count}')
+                for tool_result in session.first_tool_results:
+                    lines.append(f'    {tool_result.idx + 1}. {tool_result.action.get("action", "unknown")}')
             
-            self.stdout.write('-' * 30)
+            lines.append('-' * 30)
+        
+        self.stdout.write('\n'.join(lines))
 
     def test_tools(self):
         self.stdout.write(self.style.SUCCESS('TESTING TOOLS:'))
@@ -84,12 +142,29 @@ class Command(BaseCommand):
             }
         }
         
-        for tool_name, tool_class in tools.items():
+        # Tools are network-bound, so run them concurrently and report in registry order
+        executor = ThreadPoolExecutor(max_workers=8)
+        futures = {
+            tool_name: executor.submit(tool_class.execute, **test_params[tool_name])  # Unpack parameters
+            for tool_name, tool_class in tools.items()
+            if tool_name in test_params
+        }
+        
+        try:
+            self.report_tool_results(tools, futures)
+        finally:
+            # Don't let a hung tool block exit
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def report_tool_results(self, tools, futures):
+        # The tools run concurrently, so one shared deadline bounds the whole wait
+        deadline = time.monotonic() + TOOL_TEST_TIMEOUT
+        for tool_name in tools:
             self.stdout.write(f'\nTesting {tool_name}...')
             
-            if tool_name in test_params:
+            if tool_name in futures:
                 try:
-                    result = tool_class.execute(**test_params[tool_name])  # Unpack parameters
+                    result = futures[tool_name].result(timeout=max(0, deadline - time.monotonic()))
                     success = result.get('success', False) if isinstance(result, dict) else False
                     self.stdout.write(f'  Result: {"✅ Success" if success else "❌ Failed"}')
                     
@@ -104,48 +179,60 @@ class Command(BaseCommand):
                         error = result.get('error', 'Unknown error')
                         self.stdout.write(f'  Error: {error[:100]}...')
                         
+                except FuturesTimeoutError:
+                    self.stdout.write('  Result: ❌ Failed')
+                    self.stdout.write(f'  Error: timed out after {TOOL_TEST_TIMEOUT}s')
                 except Exception as e:
                     self.stdout.write(f'  Exception: {e}')
             else:
                 self.stdout.write(f'  Skipped: No test parameters defined')
 
-    def debug_session(self, session_id):
-        self.stdout.write(self.style.SUCCESS(f'DEBUGGING SESSION: {session_id}'))
-        self.stdout.write('=' * 50)
+    def debug_session(self, session_id, limit=None):
+        lines = [
+            self.style.SUCCESS(f'DEBUGGING SESSION: {session_id}'),
+            '=' * 50,
+        ]
         
         try:
-            session = AgentSession.objects.get(session_id=session_id)
+            # tool_results can dominate the context blob and are listed from their own table,
+            # so have the database drop them instead of shipping and parsing the whole array
+            session = AgentSession.objects.defer('context').annotate(
+                message_count=session_row_count(AgentMessage),
+                tool_result_count=session_row_count(AgentToolResult),
+                context_summary=JSONRemoveKey('context', 'tool_results')
+            ).get(session_id=session_id)
             
-            self.stdout.write(f'Status: {session.task_status}')
-            self.stdout.write(f'Created: {session.created_at}')
-            self.stdout.write(f'Updated: {session.updated_at}')
-            self.stdout.write(f'Current task: {session.current_task}')
+            lines.append(f'Status: {session.task_status}')
+            lines.append(f'Created: {session.created_at}')
+            lines.append(f'Updated: {session.updated_at}')
+            lines.append(f'Current task: {session.current_task}')
             
-            self.stdout.write('\nCONTEXT:')
-            if session.context:
-                for key, value in session.context.items():
-                    if key == 'tool_results' and isinstance(value, list):
-                        self.stdout.write(f'  {key}: {len(value)} results')
-                        for i, result in enumerate(value, 1):
-                            action = result.get('action', {})
-                            tool_result = result.get('result', {})
-                            success = tool_result.get('success', False) if isinstance(tool_result, dict) else False
-                            
-                            self.stdout.write(f'    {i}. {action.get("action", "unknown")}: {"✅" if success else "❌"}')
-                            if not success and isinstance(tool_result, dict):
-                                error = tool_result.get('error', 'No error message')
-                                self.stdout.write(f'       Error: {error[:100]}...')
-                    else:
-                        value_str = str(value)[:100] if not isinstance(value, (dict, list)) else f'{type(value).__name__} with {len(value)} items'
-                        self.stdout.write(f'  {key}: {value_str}')
+            lines.append('\nCONTEXT:')
+            if session.context_summary:
+                for key, value in session.context_summary.items():
+                    value_str = str(value)[:100] if not isinstance(value, (dict, list)) else f'{type(value).__name__} with {len(value)} items'
+                    lines.append(f'  {key}: {value_str}')
             else:
-                self.stdout.write('  No context found')
+                lines.append('  No context found')
+            
+            lines.append(f'\nTOOL RESULTS: {session.tool_result_count}')
+            tool_results = session.tool_results.only('idx', 'action', 'success', 'result').order_by('idx')
+            if limit is not None:
+                tool_results = tool_results[:limit]
+            for tool_result in tool_results:
+                lines.append(f'  {tool_result.idx + 1}. {tool_result.action.get("action", "unknown")}: {"✅" if tool_result.success else "❌"}')
+                if not tool_result.success:
+                    error = tool_result.result.get('error', 'No error message')
+                    lines.append(f'     Error: {error[:100]}...')
             
             # Show messages
-            messages = session.messages.all()
-            self.stdout.write(f'\nMESSAGES: {messages.count()}')
-            for msg in messages:
-                self.stdout.write(f'  {msg.timestamp}: {msg.message_type} - {msg.content[:100]}...')
+            # Stream rows from the cursor and leave the metadata JSON behind
+            lines.append(f'\nMESSAGES: {session.message_count}')
+            messages = session.messages.only('timestamp', 'message_type', 'content')
+            for msg in messages.iterator(chunk_size=200):
+                lines.append(f'  {msg.timestamp}: {msg.message_type} - {msg.content[:100]}...')
                 
         except AgentSession.DoesNotExist:
-            self.stdout.write(self.style.ERROR(f'Session {session_id} not found'))
\ No newline at end of file
+            lines.append(self.style.ERROR(f'Session {session_id} not found'))
+        
+        self.stdout.write('\n'.join(lines))
\ No newline at end of file
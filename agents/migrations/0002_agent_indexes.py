@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-16 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='agentsession',
+            index=models.Index(fields=['task_status', '-updated_at'], name='agents_session_status_upd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='agentmessage',
+            index=models.Index(fields=['session', 'timestamp'], name='agents_msg_session_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-16 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0002_agent_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='agentsession',
+            name='task_status',
+            field=models.CharField(choices=[('idle', 'Idle'), ('initialized', 'Initialized'), ('executing', 'Executing'), ('completed', 'Completed'), ('failed', 'Failed')], default='idle', max_length=16),
+        ),
+    ]
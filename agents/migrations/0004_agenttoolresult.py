@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-16 10:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0003_alter_agentsession_task_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgentToolResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('idx', models.PositiveIntegerField(help_text='Position of this result within the session')),
+                ('iteration', models.PositiveIntegerField(default=0, help_text='REACT iteration that produced this result')),
+                ('action', models.JSONField(blank=True, default=dict)),
+                ('success', models.BooleanField(default=False)),
+                ('result', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tool_results', to='agents.agentsession')),
+            ],
+            options={
+                'ordering': ['session', 'idx'],
+                'constraints': [models.UniqueConstraint(fields=('session', 'idx'), name='agents_toolresult_session_idx_uniq')],
+            },
+        ),
+    ]
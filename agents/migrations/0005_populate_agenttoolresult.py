@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+def copy_tool_results(apps, schema_editor):
+    """Copy tool_results stored in session context JSON into AgentToolResult rows"""
+    AgentSession = apps.get_model('agents', 'AgentSession')
+    AgentToolResult = apps.get_model('agents', 'AgentToolResult')
+    
+    for session in AgentSession.objects.only('id', 'context').iterator(chunk_size=100):
+        tool_results = (session.context or {}).get('tool_results') or []
+        rows = []
+        for idx, entry in enumerate(tool_results):
+            if not isinstance(entry, dict):
+                continue
+            result = entry.get('result') if isinstance(entry.get('result'), dict) else {}
+            rows.append(AgentToolResult(
+                session_id=session.id,
+                idx=idx,
+                iteration=entry.get('iteration') or 0,
+                action=entry.get('action') if isinstance(entry.get('action'), dict) else {},
+                success=bool(result.get('success', False)),
+                result=result,
+            ))
+        if rows:
+            AgentToolResult.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0004_agenttoolresult'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_tool_results, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-16 10:30
+
+import agents.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0005_populate_agenttoolresult'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='agentsession',
+            name='context',
+            field=models.JSONField(default=dict, encoder=agents.models.CompactJSONEncoder),
+        ),
+        migrations.AlterField(
+            model_name='agenttoolresult',
+            name='result',
+            field=models.JSONField(blank=True, default=dict, encoder=agents.models.CompactJSONEncoder),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-16 11:05
+
+import agents.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0006_compact_json_encoder'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='agentsession',
+            name='context',
+            field=models.JSONField(decoder=agents.models.FastJSONDecoder, default=dict, encoder=agents.models.CompactJSONEncoder),
+        ),
+        migrations.AlterField(
+            model_name='agenttoolresult',
+            name='result',
+            field=models.JSONField(blank=True, decoder=agents.models.FastJSONDecoder, default=dict, encoder=agents.models.CompactJSONEncoder),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-16 11:40
+
+import agents.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0007_fast_json_decoder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgentPlanCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='SHA1 of the normalized request and data sources context', max_length=40, unique=True)),
+                ('user_request', models.TextField()),
+                ('plan', models.JSONField(decoder=agents.models.FastJSONDecoder, default=dict, encoder=agents.models.CompactJSONEncoder)),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-16 12:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0008_agentplancache'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='agentmessage',
+            options={'ordering': ['timestamp', 'id']},
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-16 12:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0009_alter_agentmessage_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgentReasoningStep',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('iteration', models.PositiveIntegerField(default=0)),
+                ('action', models.CharField(blank=True, max_length=100)),
+                ('reasoning', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reasoning_steps', to='agents.agentsession')),
+            ],
+            options={
+                'ordering': ['session', 'id'],
+            },
+        ),
+    ]
@@ -1,15 +1,57 @@
+import json
+
 from django.db import models
 
+from .json_utils import orjson, orjson_available
+
+
+class CompactJSONEncoder(json.JSONEncoder):
+    """JSON encoder without separator whitespace or \\u escapes, for smaller stored rows"""
+    
+    def __init__(self, *args, **kwargs):
+        kwargs['separators'] = (',', ':')
+        kwargs['ensure_ascii'] = False
+        super().__init__(*args, **kwargs)
+    
+    def encode(self, o):
+        # orjson produces the same compact output several times faster on large contexts
+        if orjson_available:
+            try:
+                return orjson.dumps(o, option=orjson.OPT_NON_STR_KEYS).decode()
+            except TypeError:
+                pass
+        return super().encode(o)
+
+
+class FastJSONDecoder(json.JSONDecoder):
+    """JSON decoder that parses with orjson when installed"""
+    
+    def decode(self, s, *args, **kwargs):
+        if orjson_available:
+            try:
+                return orjson.loads(s)
+            except orjson.JSONDecodeError:
+                pass
+        return super().decode(s, *args, **kwargs)
+
 
 class AgentSession(models.Model):
     """Represents a conversation session with the LLM agent"""
     
+    STATUS_CHOICES = [
+        ('idle', 'Idle'),
+        ('initialized', 'Initialized'),
+        ('executing', 'Executing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
     session_id = models.CharField(max_length=100, unique=True, db_index=True)
-    context = models.JSONField(default=dict)  # Conversation context and state
+    context = models.JSONField(default=dict, encoder=CompactJSONEncoder, decoder=FastJSONDecoder)  # Conversation context and state
     
     # Current task state
     current_task = models.TextField(blank=True)
-    task_status = models.CharField(max_length=50, default='idle')
+    task_status = models.CharField(max_length=16, choices=STATUS_CHOICES, default='idle')
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -19,6 +61,9 @@ class AgentSession(models.Model):
     
     class Meta:
         ordering = ['-updated_at']
+        indexes = [
+            models.Index(fields=['task_status', '-updated_at'], name='agents_session_status_upd_idx'),
+        ]
 
 
 class AgentMessage(models.Model):
@@ -44,7 +89,82 @@ class AgentMessage(models.Model):
         return f"{self.message_type}: {self.content[:50]}..."
     
     class Meta:
-        ordering = ['timestamp']
+        ordering = ['timestamp', 'id']  # Bulk-inserted messages can share a timestamp
+        indexes = [
+            models.Index(fields=['session', 'timestamp'], name='agents_msg_session_ts_idx'),
+        ]
+
+
+class AgentToolResult(models.Model):
+    """A single tool execution recorded during an agent session"""
+    
+    session = models.ForeignKey(AgentSession, on_delete=models.CASCADE, related_name='tool_results')
+    idx = models.PositiveIntegerField(help_text="Position of this result within the session")
+    iteration = models.PositiveIntegerField(default=0, help_text="REACT iteration that produced this result")
+    
+    action = models.JSONField(default=dict, blank=True)  # Tool name and parameters chosen by the agent
+    success = models.BooleanField(default=False)
+    result = models.JSONField(default=dict, blank=True, encoder=CompactJSONEncoder, decoder=FastJSONDecoder)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.action.get('action', 'unknown')} #{self.idx} ({'ok' if self.success else 'failed'})"
+    
+    class Meta:
+        ordering = ['session', 'idx']
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'idx'], name='agents_toolresult_session_idx_uniq'),
+        ]
+
+
+class AgentReasoningStep(models.Model):
+    """A reasoning step archived from an agent session's rolling context window"""
+    
+    session = models.ForeignKey(AgentSession, on_delete=models.CASCADE, related_name='reasoning_steps')
+    iteration = models.PositiveIntegerField(default=0)
+    action = models.CharField(max_length=100, blank=True)
+    reasoning = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.action or 'no action'} (iteration {self.iteration})"
+    
+    class Meta:
+        ordering = ['session', 'id']
+
+
+class AgentPlanCache(models.Model):
+    """Implementation plan stored for a normalized user request, reused instead of re-planning"""
+    
+    key = models.CharField(max_length=40, unique=True, help_text="SHA1 of the normalized request and data sources context")
+    user_request = models.TextField()
+    plan = models.JSONField(default=dict, encoder=CompactJSONEncoder, decoder=FastJSONDecoder)
+    hit_count = models.PositiveIntegerField(default=0)
+    
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    def __str__(self):
+        return self.user_request[:50]
+    
+    class Meta:
+        ordering = ['-created_at']
+
+
+class AgentCompletionCache(models.Model):
+    """LLM completion text stored by prompt hash, reused for identical requests"""
+    
+    key = models.CharField(max_length=64, unique=True, help_text="SHA256 of model, sampling settings and normalized prompts")
+    content = models.TextField()
+    
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    def __str__(self):
+        return self.key
+    
+    class Meta:
+        ordering = ['-created_at']
 
 
 class AgentCapability(models.Model):
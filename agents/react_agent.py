@@ -1,22 +1,267 @@
+import functools
+import hashlib
 import json
+import re
+import threading
 import time
-from typing import Dict, Any, List, Optional, Union
+from collections import OrderedDict
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from typing import Callable, Dict, Any, List, Optional, Union
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Count, F, Max, Q
 from django.utils import timezone
 import logging
 
 from .tools import tool_registry, AgentTool
-from .models import AgentSession, AgentMessage
+from .models import AgentSession, AgentMessage, AgentToolResult, AgentReasoningStep, AgentPlanCache, AgentCompletionCache
+from .contexts import get_data_sources_context, get_stac_collections, get_templates_context
+from .json_utils import JSONObjectTracker, dumps, extract_json, find_json_object, loads
+from .services import EMPTY_HTML_CONTENT, get_openai_client
 
 try:
-    from openai import OpenAI
-    openai_available = True
+    import tiktoken
+    tiktoken_available = True
 except ImportError:
-    OpenAI = None
-    openai_available = False
+    tiktoken = None
+    tiktoken_available = False
 
 logger = logging.getLogger(__name__)
 
+# In-process tier in front of AgentCompletionCache: key -> (created_at, content), least recently used first.
+# Repeated prompts in one worker skip the database lookup as well as the OpenAI call.
+completion_memo = OrderedDict()
+completion_memo_lock = threading.Lock()
+COMPLETION_MEMO_MAX_ENTRIES = 256
+
+# Expired cache rows are deleted at most this often per process and table, not on every write
+CACHE_PURGE_INTERVAL_SECONDS = 3600
+cache_purge_times = {}
+cache_purge_lock = threading.Lock()
+
+# Keys picked out of a partially streamed reasoning reply
+STREAM_ACTION_PATTERN = re.compile(r'"action"\s*:\s*"([^"]+)"')
+STREAM_PARAMETERS_PATTERN = re.compile(r'"parameters"\s*:\s*(?=\{)')
+
+# Structured output for the final page: every field is a required string, so the reply can't
+# omit fields or add extra ones. Reasoning replies keep plain JSON mode, as tool parameters are free-form.
+HTML_CONTENT_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "html_page",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {field: {"type": "string"} for field in EMPTY_HTML_CONTENT},
+            "required": list(EMPTY_HTML_CONTENT),
+            "additionalProperties": False
+        }
+    }
+}
+
+# Reply keys for the reasoning prompt (indented to sit inside it). The model reasons before it
+# picks an action, except when streaming: then the action comes first so its tool can start early.
+REASONING_REPLY_KEYS = """Return a JSON object with these keys, in this order:
+        - "reasoning": Your detailed thought process (reference the implementation plan)
+        - "action": Tool name to use (web_search, validate_api_endpoint, fetch_stac_sample_data, etc.)
+        - "parameters": Parameters for the tool"""
+STREAMED_REASONING_REPLY_KEYS = """Return a JSON object with these keys, in this order:
+        - "action": Tool name to use (web_search, validate_api_endpoint, fetch_stac_sample_data, etc.)
+        - "parameters": Parameters for the tool
+        - "reasoning": Your detailed thought process (reference the implementation plan)"""
+
+# JSON mode can degenerate into endless whitespace after the object; a blank-line run ends the reply
+# early. Newlines inside JSON strings are escaped, so a valid reply never contains one.
+REASONING_STOP_SEQUENCES = ["\n\n\n"]
+
+# Prompt context blocks rebuilt from the cache on every agent start, never stored on the session
+TRANSIENT_CONTEXT_KEYS = ('available_data_sources', 'available_templates')
+
+# Static parts of the final generation prompts, built once at import. Lines keep the
+# indentation of the surrounding prompt text they are spliced into.
+FINAL_GENERATION_INSTRUCTIONS = """Create a complete, functional webpage that IMPLEMENTS THE PLAN:
+        1. Fulfills ALL functional requirements from the implementation plan
+        2. Includes ALL specified UI components  
+        3. Uses the ACTUAL information you've gathered through research
+        4. Integrates with verified data sources and APIs
+        5. Meets the success criteria defined in the plan
+
+        ⚠️ CRITICAL URL REQUIREMENTS ⚠️:
+        - ONLY use EXACT API endpoints discovered through your research
+        - DO NOT modify, construct, or assume URL patterns
+        - Copy URLs EXACTLY from your tool results
+        - Add comments in JavaScript showing which research result provided each URL
+        - Include comprehensive error handling for all API calls
+        
+        ⚠️ CRITICAL GEOJSON/MAP HANDLING ⚠️:
+        - STAC GeoJSON often contains complex polygon geometries, not simple points
+        - For polygons: extract centroid or first coordinate pair for markers
+        - Always validate coordinates exist before creating markers
+        - Example coordinate extraction:
+        ```javascript
+        function getCoordinates(geometry) {
+            if (geometry.type === 'Point') {
+                return geometry.coordinates; // [lng, lat]
+            } else if (geometry.type === 'Polygon') {
+                return geometry.coordinates[0][0]; // First point of first ring
+            }
+            return null; // Handle other types
+        }
+        ```
+
+        ⚠️ CRITICAL TEMPLATE INJECTION UNDERSTANDING ⚠️:
+        Your generated content will be injected into this template structure:
+        
+        ```html
+        <!DOCTYPE html>
+        <html lang="en">
+        <head>
+            <meta charset="UTF-8">
+            <title>{{ title }}</title>
+            <link href="https://unpkg.com/leaflet/dist/leaflet.css" rel="stylesheet">
+            <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
+            <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css" rel="stylesheet">
+            <style>{{ custom_css }}</style>
+        </head>
+        <body>
+            {{ main_content }}
+            <script src="https://unpkg.com/leaflet/dist/leaflet.js"></script>
+            <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js"></script>
+            <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
+            <script>{{ custom_js }}</script>
+        </body>
+        </html>
+        ```
+        
+        DO NOT generate <html>, <head>, or <body> tags - only the content that goes inside!
+        
+        Return ONLY a valid JSON object (no markdown, no explanations) with these exact fields:
+        {
+          "title": "Specific, actionable page title based on research",
+          "description": "Clear description incorporating gathered intelligence", 
+          "main_content": "HTML body content ONLY (no html/head/body tags) with Bootstrap containers",
+          "custom_css": "CSS rules ONLY (no <style> tags)",
+          "custom_js": "JavaScript code ONLY (no <script> tags) with EXACT URLs from research"
+        }
+        
+        🚨 CRITICAL JSON FORMATTING:
+        - Escape all backslashes in strings (use \\\\ for single \\)
+        - Escape all quotes in strings (use \\" for ")
+        - No line breaks inside JSON string values - use \\n instead
+        - Ensure all braces and brackets are properly matched"""
+
+FINAL_GENERATION_USER_GUIDE = """Use the intelligence I've gathered to create an accurate, functional application that incorporates:
+        - Current news and events from web research
+        - Validated API endpoints and data sources
+        - Real data structures and sample content
+        - Specific geographic information and coordinates
+        - Recent developments and current situation
+
+        🔗 URL VALIDATION REQUIREMENTS:
+        - Every API call must reference a URL from your research results
+        - Add JavaScript comments like: "// URL from STAC validation tool result"
+        - Include the exact collection names and parameters you discovered
+        - Use error handling: try/catch blocks with fallback messages
+        - No invented endpoints - only researched ones
+
+        🚨 LIBRARY USAGE EXAMPLES (all libraries are PRE-LOADED):
+        ```javascript
+        // MAPS (Leaflet is ready - MUST add OSM basemap):
+        const map = L.map('mapId').setView([lat, lng], zoom);
+        // REQUIRED: Add OpenStreetMap basemap to every map:
+        L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
+            attribution: '© OpenStreetMap contributors'
+        }).addTo(map);
+        L.marker([lat, lng]).addTo(map).bindPopup('Info');
+        
+        // CHARTS (Chart.js is ready):
+        const ctx = document.getElementById('chartId').getContext('2d');
+        const chart = new Chart(ctx, { type: 'line', data: data });
+        
+        // STYLING (Bootstrap is ready):
+        <div class="card">
+          <div class="card-header">Title</div>
+          <div class="card-body">Content</div>
+        </div>
+        ```
+
+        EXAMPLE of proper API call:
+        ```javascript
+        // URL validated by fetch_stac_sample_data tool - collection: gdacs-events
+        const stacUrl = 'https://montandon-eoapi-stage.ifrc.org/stac/search';
+        fetch(stacUrl + '?collections=gdacs-events&bbox=88,20,93,27')
+        ```
+
+        Make this a production-ready application that provides real value for disaster response."""
+
+
+@functools.lru_cache(maxsize=1)
+def _token_encoding():
+    """
+    The gpt-4o-mini tokenizer, or None without one. tiktoken downloads its BPE file on first
+    use, so offline this fails with a network error; the result is cached so it's tried once.
+    """
+    if not tiktoken_available:
+        return None
+    try:
+        return tiktoken.encoding_for_model("gpt-4o-mini")
+    except Exception as e:  # KeyError on tiktoken too old to know the model, or download errors
+        logger.warning("tiktoken unavailable, estimating token counts: %s", e)
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Token count for gpt-4o-mini prompts, estimated at ~4 characters per token without tiktoken"""
+    encoding = _token_encoding()
+    if encoding is not None:
+        try:
+            return len(encoding.encode(text))
+        except Exception:
+            pass
+    return len(text) // 4 + 1
+
+
+def _memo_get_completion(key: str, cutoff) -> Optional[str]:
+    with completion_memo_lock:
+        entry = completion_memo.get(key)
+        if entry is None:
+            return None
+        if entry[0] < cutoff:
+            del completion_memo[key]
+            return None
+        completion_memo.move_to_end(key)
+        return entry[1]
+
+
+def _memo_put_completion(key: str, created_at, content: str):
+    with completion_memo_lock:
+        completion_memo[key] = (created_at, content)
+        completion_memo.move_to_end(key)
+        while len(completion_memo) > COMPLETION_MEMO_MAX_ENTRIES:
+            completion_memo.popitem(last=False)
+
+
+def _purge_expired(model, cutoff):
+    """Delete rows of a cache model older than cutoff, throttled by CACHE_PURGE_INTERVAL_SECONDS"""
+    now = time.monotonic()
+    with cache_purge_lock:
+        last = cache_purge_times.get(model)
+        if last is not None and now - last < CACHE_PURGE_INTERVAL_SECONDS:
+            return
+        cache_purge_times[model] = now
+    model.objects.filter(created_at__lt=cutoff).delete()
+
+
+def _call_in_worker(func, *args, **kwargs):
+    """Run func from a worker thread and release that thread's DB connections"""
+    try:
+        return func(*args, **kwargs)
+    finally:
+        connections.close_all()
+
 
 class ReactAgent:
     """
@@ -24,17 +269,30 @@ class ReactAgent:
     before generating final HTML content
     """
     
-    def __init__(self, session_id: Optional[str] = None):
+    def __init__(self, session_id: Optional[str] = None,
+                 on_partial: Optional[Callable[[str, str], None]] = None):
         self.session_id = session_id or f"agent_{int(time.time())}"
+        # Called with (field_name, value) as each field of the final page finishes streaming
+        self.on_partial = on_partial
         self.max_iterations = settings.AGENT_MAX_ITERATIONS
         self.max_llm_calls = settings.AGENT_MAX_LLM_CALLS
         self.llm_calls_made = 0
         self.iterations_completed = 0
-        
-        # Initialize OpenAI client
-        self.client = None
-        if openai_available and settings.OPENAI_API_KEY:
-            self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.session_flush_interval = max(1, getattr(settings, 'AGENT_SESSION_FLUSH_INTERVAL', 3))
+        self._dirty = False
+        self._prefetched_tool = None
+        self._executor = None
+        self._reasoning_system_prompts = None
+        self._pending_rows = None
+        self._url_extraction = None
+        self._summary_cache = None
+        self._tool_cache = {}
+        # One timestamp per REACT iteration, shared by the tool results and reasoning step it records
+        self._iteration_timestamp = None
+        self.context_window = max(3, getattr(settings, 'AGENT_CONTEXT_WINDOW', 10))
+        
+        # Shared OpenAI client
+        self.client = get_openai_client()
         
         # Agent context - accumulates knowledge over iterations
         self.context = {
@@ -49,141 +307,214 @@ class ReactAgent:
         
         # Get or create agent session
         self.session = self._get_or_create_session()
+        
+        # Running tallies for the research gate, so it doesn't rescan tool_results each step.
+        # The context only keeps a rolling window, so a resumed session counts from the table.
+        self._tool_result_count = self._success_count = self._stac_success_count = 0
+        if self.context["tool_results"]:
+            self._load_tool_result_counts()
     
-    def _get_or_create_session(self) -> AgentSession:
-        """Get or create an agent session"""
-        session, created = AgentSession.objects.get_or_create(
-            session_id=self.session_id,
-            defaults={
-                'context': self.context,
-                'current_task': '',
-                'task_status': 'initialized'
-            }
+    def _load_tool_result_counts(self):
+        """Set the research gate tallies from the session's stored tool results"""
+        counts = self.session.tool_results.aggregate(
+            next_idx=Max('idx'),
+            succeeded=Count('id', filter=Q(success=True)),
+            stac=Count('id', filter=Q(success=True, action__action='fetch_stac_sample_data'))
         )
+        self._tool_result_count = 0 if counts['next_idx'] is None else counts['next_idx'] + 1
+        self._success_count = counts['succeeded']
+        self._stac_success_count = counts['stac']
+    
+    def _get_or_create_session(self) -> AgentSession:
+        """
+        Load an existing agent session, or build a new one that is only inserted on its
+        first save, so starting a run costs one SELECT and one INSERT instead of an extra UPDATE
+        """
+        session = AgentSession.objects.filter(session_id=self.session_id).first()
+        if session is None:
+            return AgentSession(
+                session_id=self.session_id,
+                context=self._persisted_context(),
+                current_task='',
+                task_status='initialized'
+            )
         
-        if not created:
-            # Load existing context
-            self.context.update(session.context)
-        
+        # Load existing context, keeping the freshly built prompt contexts
+        self.context.update(
+            (key, value) for key, value in session.context.items() if key not in TRANSIENT_CONTEXT_KEYS
+        )
+        # Sessions saved before results moved to AgentToolResult hold {"action", "result"} entries
+        self.context["tool_results"] = [
+            entry if "summary" in entry else self._compact_legacy_tool_result(entry)
+            for entry in self.context.get("tool_results") or []
+            if isinstance(entry, dict)
+        ][-self.context_window:]
         return session
     
-    def _save_session(self):
-        """Save current context to session"""
-        self.session.context = self.context
-        self.session.updated_at = timezone.now()
-        self.session.save()
+    def _compact_legacy_tool_result(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a pre-AgentToolResult context entry to the compact summary shape"""
+        tool_result = entry.get("result") if isinstance(entry.get("result"), dict) else {}
+        success = bool(tool_result.get("success", False))
+        return {
+            "iteration": entry.get("iteration") or 0,
+            "action": entry.get("action") if isinstance(entry.get("action"), dict) else {},
+            "success": success,
+            "summary": (self._summarize_tool_result(tool_result) if success
+                        else f"Failed - {tool_result.get('error', 'Unknown error')}"),
+            "timestamp": entry.get("timestamp", "")
+        }
+    
+    def _insert_session(self):
+        """Insert a session built by _get_or_create_session, adopting the row if another agent created it first"""
+        try:
+            with transaction.atomic():
+                self.session.save(force_insert=True)
+        except IntegrityError:
+            self.session.pk = AgentSession.objects.values_list('pk', flat=True).get(session_id=self.session_id)
+            self.session.save(update_fields=['context', 'current_task', 'task_status', 'updated_at'])
+            # The adopted row may already have tool results; continue numbering after them
+            self._load_tool_result_counts()
+    
+    def _persisted_context(self) -> Dict[str, Any]:
+        """The part of the context stored on the session row"""
+        return {key: value for key, value in self.context.items() if key not in TRANSIENT_CONTEXT_KEYS}
+    
+    def _save_session(self, force: bool = True):
+        """
+        Save current context and buffered messages in one transaction. Non-forced saves
+        only mark the session dirty and are flushed every AGENT_SESSION_FLUSH_INTERVAL iterations.
+        """
+        self._dirty = True
+        if not force and self.iterations_completed % self.session_flush_interval:
+            return
+        
+        # updated_at is auto_now, so save() stamps it
+        self.session.context = self._persisted_context()
+        with transaction.atomic():
+            if self.session.pk is None:
+                self._insert_session()
+            else:
+                self.session.save(update_fields=['context', 'current_task', 'task_status', 'updated_at'])
+            self._flush_pending_rows()
+        self._dirty = False
     
     def _log_message(self, message_type: str, content: str, metadata: Dict[str, Any] = None):
         """Log a message to the agent session"""
-        AgentMessage.objects.create(
+        self._queue_row(AgentMessage(
             session=self.session,
             message_type=message_type,
             content=content,
             metadata=metadata or {}
+        ))
+    
+    def _queue_row(self, row):
+        """Save a row now, or buffer it for the next session save while execute() is running"""
+        if self._pending_rows is None:
+            if self.session.pk is None:
+                self._insert_session()
+            row.save()
+        else:
+            self._pending_rows.append(row)
+    
+    def _flush_pending_rows(self):
+        """Write buffered messages and reasoning steps with one bulk INSERT per model"""
+        if self._pending_rows:
+            rows, self._pending_rows = self._pending_rows, []
+            rows_by_model = {}
+            for row in rows:
+                rows_by_model.setdefault(type(row), []).append(row)
+            for model, model_rows in rows_by_model.items():
+                model.objects.bulk_create(model_rows, batch_size=100)
+    
+    def _record_tool_result(self, action: Dict[str, Any], tool_result: Dict[str, Any]):
+        """
+        Persist the raw tool result as an AgentToolResult row and keep only a compact
+        summary of the most recent results in the context
+        """
+        success = bool(tool_result.get("success", False))
+        if success:
+            self._success_count += 1
+            if action.get("action") == "fetch_stac_sample_data":
+                self._stac_success_count += 1
+        
+        tool_name = action.get("action", "unknown")
+        row = self._create_tool_result_row(action, success, tool_result)
+        
+        # The payload lives on the AgentToolResult row; the message only references it
+        self._log_message(
+            "tool",
+            f"Executed {tool_name}" if success else f"Tool {tool_name} failed: {tool_result.get('error', 'Unknown error')}",
+            {
+                "tool": tool_name,
+                "params_hash": hashlib.sha1(json.dumps(action.get("parameters"), sort_keys=True, default=str).encode()).hexdigest(),
+                "result_ref": row.pk,
+                "success": success
+            }
         )
+        
+        self.context["tool_results"].append({
+            "iteration": self.iterations_completed,
+            "action": action,
+            "success": success,
+            "summary": (self._summarize_tool_result(tool_result) if success
+                        else f"Failed - {tool_result.get('error', 'Unknown error')}"),
+            "timestamp": self._iteration_timestamp or timezone.now().isoformat()
+        })
+        del self.context["tool_results"][:-self.context_window]
+    
+    def _create_tool_result_row(self, action: Dict[str, Any], success: bool,
+                                tool_result: Dict[str, Any], attempts: int = 3) -> AgentToolResult:
+        """
+        Insert an AgentToolResult at the next idx. Agents sharing a session (ids default to the
+        start second) can take the same idx; on a clash the next free one is read from the table.
+        """
+        if self.session.pk is None:
+            self._insert_session()
+        for attempt in range(attempts):
+            try:
+                with transaction.atomic():
+                    row = AgentToolResult.objects.create(
+                        session=self.session,
+                        idx=self._tool_result_count,
+                        iteration=self.iterations_completed,
+                        action=action,
+                        success=success,
+                        result=tool_result
+                    )
+            except IntegrityError:
+                if attempt == attempts - 1:
+                    raise
+                last_idx = self.session.tool_results.aggregate(last=Max('idx'))['last']
+                self._tool_result_count = 0 if last_idx is None else last_idx + 1
+            else:
+                self._tool_result_count += 1
+                return row
+    
+    def _raw_tool_results(self):
+        """Load the (action, success, result) rows recorded for this session, in order"""
+        if self.session.pk is None:
+            return []  # Not inserted yet, so no tool has run
+        return list(self.session.tool_results.order_by('idx').values_list('action', 'success', 'result'))
     
     def _get_data_sources_context(self) -> str:
         """Get available data sources context with strong priority emphasis"""
-        from datasets.models import DataSource
-        
-        active_sources = DataSource.objects.filter(is_active=True).order_by('category', 'name')
-        
-        if not active_sources.exists():
-            return "No configured data sources available."
-        
-        context_parts = [
-            "🎯 PRIORITY DATA SOURCES - USE THESE FIRST:",
-            "=" * 50,
-            "These are CONFIGURED, VALIDATED data sources that should be your PRIMARY choice.",
-            "Only use external sources if these don't have the needed data.",
-        ]
-        
-        current_category = None
-        total_collections = 0
-        
-        for source in active_sources:
-            if source.category != current_category:
-                current_category = source.category
-                category_name = dict(source.CATEGORY_CHOICES).get(source.category, source.category)
-                context_parts.append(f"\n📊 {category_name.upper()}:")
-            
-            context_parts.append(f"✅ {source.name}: {source.description}")
-            
-            if source.is_stac_catalog():
-                collections = source.get_available_collections()
-                total_collections += len(collections)
-                
-                context_parts.append(f"   🔗 STAC Search URL: {source.get_stac_search_url()}")
-                context_parts.append(f"   📋 Available Collections ({len(collections)} total):")
-                
-                # Group collections by type and show them more descriptively
-                collection_groups = {
-                    'events': [c for c in collections if 'events' in c.lower()],
-                    'hazards': [c for c in collections if 'hazard' in c.lower()], 
-                    'impacts': [c for c in collections if 'impact' in c.lower()],
-                    'other': [c for c in collections if not any(x in c.lower() for x in ['events', 'hazard', 'impact'])]
-                }
-                
-                for group_name, group_collections in collection_groups.items():
-                    if group_collections:
-                        context_parts.append(f"     📊 {group_name.title()}: {', '.join(group_collections[:3])}")
-                        if len(group_collections) > 3:
-                            context_parts.append(f"         ... and {len(group_collections) - 3} more {group_name}")
-                
-                # Add specific usage examples with real collection names
-                example_collections = collections[:2]
-                context_parts.append(f"   💡 Usage Examples:")
-                for coll in example_collections:
-                    context_parts.append(f"     • fetch_stac_sample_data(collection='{coll}', limit=3)")
-                    
-                context_parts.append(f"   ⚡ PRIORITY: Always fetch sample data from these collections FIRST")
-            
-            if source.llm_context:
-                context_parts.append(f"   📝 Context: {source.llm_context}")
-        
-        context_parts.extend([
-            "",
-            "=" * 50,
-            f"🚨 CRITICAL: These {active_sources.count()} configured sources contain {total_collections} data collections.",
-            "ALWAYS check these sources BEFORE searching for external alternatives.",
-            "Use 'fetch_stac_sample_data' tool to get real data structure and examples."
-        ])
-        
-        return "\n".join(context_parts)
+        return get_data_sources_context()
     
     def _get_available_templates_context(self) -> str:
         """Get available HTML templates and their pre-loaded libraries"""
-        from generator.models import HTMLTemplate
-        
-        active_templates = HTMLTemplate.objects.filter(is_active=True).order_by('template_type', 'name')
-        
-        if not active_templates.exists():
-            return "No HTML templates available - will generate from scratch."
-        
-        context_parts = [
-            "🎯 ALL COMMON LIBRARIES ARE PRE-LOADED:",
-            "=" * 50,
-            "Every template includes ALL major libraries ready to use:",
-            "",
-            "✅ LEAFLET (Maps): Use L.map(), L.marker(), etc. directly",
-            "✅ CHART.JS (Charts): Use new Chart() directly", 
-            "✅ BOOTSTRAP (Styling): All CSS classes & JS components available",
-            "✅ FONT AWESOME (Icons): Use <i class='fas fa-icon'></i>",
-            "",
-            f"📋 {active_templates.count()} templates available:",
-            "• Enhanced Map Template (map layouts with utility functions)",
-            "• Enhanced Dashboard Template (dashboard layouts with metrics)",
-            "• Comprehensive Template (flexible general-purpose layout)",
-            "",
-            "=" * 50,
-            "🚨 CRITICAL: Libraries are ALREADY loaded - DON'T add <script> or <link> tags!",
-            "• Use L.map('elementId') for maps (Leaflet ready)",
-            "• Use new Chart(ctx, config) for charts (Chart.js ready)",
-            "• Use Bootstrap classes like 'container', 'btn', 'card' (Bootstrap ready)",
-            "• All templates include utility functions: createMap(), createChart(), showLoading()",
-        ]
+        return get_templates_context()
+    
+    @classmethod
+    async def aexecute(cls, user_request: str, session_id: Optional[str] = None,
+                       on_partial: Optional[Callable[[str, str], None]] = None) -> Dict[str, Any]:
+        """
+        Create an agent and execute it from async code without blocking the event loop.
+        The ORM and OpenAI calls stay synchronous and run in a worker thread, as does on_partial.
+        """
+        def run():
+            return cls(session_id, on_partial=on_partial).execute(user_request)
         
-        return "\n".join(context_parts)
+        return await sync_to_async(_call_in_worker, thread_sensitive=False)(run)
     
     def execute(self, user_request: str) -> Dict[str, Any]:
         """
@@ -192,14 +523,22 @@ class ReactAgent:
         self.context["user_request"] = user_request
         self.session.current_task = user_request
         self.session.task_status = 'executing'
-        self._save_session()
+        # Not written on its own: the first periodic save (or the first tool result row) carries it
+        self._dirty = True
         
+        self._pending_rows = []
         self._log_message("user", user_request)
         
         try:
             # PLANNING PHASE: First understand and plan the request
+            first_action = None
             if not self.context.get("planning_completed", False):
-                planning_result = self._create_implementation_plan()
+                if getattr(settings, 'AGENT_FUSED_PLANNING', False):
+                    # One LLM call returns both the plan and the first REACT action
+                    planning_result = self._plan_and_first_action()
+                    first_action = planning_result.get("first_action")
+                else:
+                    planning_result = self._create_implementation_plan()
                 if planning_result.get("success"):
                     self.context["implementation_plan"] = planning_result["plan"]
                     self.context["planning_completed"] = True
@@ -216,28 +555,29 @@ class ReactAgent:
                    not self.context["ready_to_generate"]):
                 
                 self.iterations_completed += 1
+                self._iteration_timestamp = timezone.now().isoformat()
                 logger.info(f"REACT iteration {self.iterations_completed}")
                 
-                # Reason: Ask LLM what to do next
-                action = self._reason_about_next_step()
+                # Reason: Ask LLM what to do next (the fused planning call may already have)
+                if first_action:
+                    action = self._finalize_action(first_action)
+                    first_action = None
+                else:
+                    action = self._reason_about_next_step()
                 
                 if action.get("action") == "generate_final_html":
                     self.context["ready_to_generate"] = True
                     break
                 
-                # Act: Execute the chosen tool
-                if action.get("action") and action.get("action") != "no_action":
-                    tool_result = self._execute_tool(action)
-                    
-                    # Observe: Add results to context
-                    self.context["tool_results"].append({
-                        "iteration": self.iterations_completed,
-                        "action": action,
-                        "result": tool_result,
-                        "timestamp": timezone.now().isoformat()
-                    })
+                # Act: Execute the chosen tool(s)
+                tool_actions = self._get_tool_actions(action)
+                tool_results = self._execute_tools(tool_actions)
                 
-                self._save_session()
+                # Observe: Add results to context
+                for tool_action, tool_result in zip(tool_actions, tool_results):
+                    self._record_tool_result(tool_action, tool_result)
+                
+                self._save_session(force=False)
             
             # Generate final HTML using gathered intelligence
             final_result = self._generate_final_html()
@@ -257,33 +597,146 @@ class ReactAgent:
                 "error": str(e),
                 "context": self.context
             }
+        
+        finally:
+            try:
+                if self._dirty:
+                    # Interrupted between flush intervals: keep the context written since the last save
+                    self._save_session()
+                else:
+                    self._flush_pending_rows()
+            except Exception as e:
+                logger.error(f"Failed to save agent session {self.session_id}: {e}")
+            self._pending_rows = None
+            if self._executor:
+                # Don't wait for abandoned (timed out) tools; their HTTP timeouts end them
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
     
     def _reason_about_next_step(self) -> Dict[str, Any]:
         """
         Ask the LLM to reason about what to do next based on current context
         """
+        fast_path_action = self._fast_path_action()
+        if fast_path_action:
+            self._log_message("agent", "Fast path: first step chosen without a reasoning LLM call")
+            return self._finalize_action(fast_path_action)
+        
         if not self.client or self.llm_calls_made >= self.max_llm_calls:
             return {"action": "generate_final_html", "reasoning": "LLM calls exhausted"}
         
-        # Build reasoning prompt with implementation plan
-        implementation_plan = self.context.get('implementation_plan', {})
-        plan_summary = implementation_plan.get('summary', 'No plan available')
-        research_tasks = implementation_plan.get('research_tasks', [])
-        data_requirements = implementation_plan.get('data_requirements', [])
+        # Include previous context
+        context_summary = self._build_context_summary()
         
-        system_prompt = f"""
-        You are a REACT agent executing a planned disaster response application implementation.
+        user_prompt = f"""
+        Context so far:
+        {context_summary}
         
-        IMPLEMENTATION PLAN:
-        {plan_summary}
+        Based on the implementation plan, what should I do next to complete the research phase?
         
-        DATA REQUIREMENTS:
-        {chr(10).join('- ' + req for req in data_requirements) if data_requirements else '- No specific requirements identified'}
+        Review the implementation plan and consider:
+        1. Which research tasks from the plan have I completed?
+        2. Which data requirements do I still need to validate?
+        3. What specific information is still missing to execute the plan?
+        4. Am I ready to generate the application based on the plan and gathered intelligence?
         
-        RESEARCH TASKS TO COMPLETE:
-        {chr(10).join('- ' + task for task in research_tasks) if research_tasks else '- No specific research tasks identified'}
+        Focus on completing the planned research systematically rather than random exploration.
         
-        Current task: {self.context['user_request']}
+        Respond with valid JSON only.
+        """
+        messages = self._get_reasoning_messages(user_prompt)
+        
+        try:
+            self.llm_calls_made += 1
+            
+            if getattr(settings, 'AGENT_STREAM_REASONING', False):
+                content = self._stream_reasoning(messages)
+            else:
+                response = self.client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=messages,
+                    temperature=0.3,
+                    max_tokens=getattr(settings, 'AGENT_MAX_TOKENS_REASONING', 600),
+                    response_format={"type": "json_object"},
+                    stop=REASONING_STOP_SEQUENCES
+                )
+                content = response.choices[0].message.content.strip()
+                self._log_prompt_cache_usage(response.usage)
+            
+            # Parse JSON with error handling
+            try:
+                action = extract_json(content)
+            except json.JSONDecodeError as e:
+                logger.error("JSON decode error in reasoning step: %s", e)
+                # For reasoning steps, return a safe fallback
+                return {
+                    "action": "no_action",
+                    "reasoning": f"JSON parsing failed: {str(e)}",
+                    "continue": True
+                }
+            
+            return self._finalize_action(action)
+            
+        except Exception as e:
+            logger.error(f"Reasoning step failed: {e}")
+            return {
+                "action": "generate_final_html",
+                "reasoning": f"Error in reasoning: {str(e)}",
+                "continue": False
+            }
+    
+    def _fast_path_action(self) -> Optional[Dict[str, Any]]:
+        """
+        First-step action that needs no LLM call: the research gate requires STAC sample data,
+        so when the plan names configured collections, fetching them is the known first move
+        """
+        if (not getattr(settings, 'AGENT_FAST_PATH', True) or self.iterations_completed != 1
+                or self._tool_result_count):
+            return None
+        
+        implementation_plan = self.context.get('implementation_plan', {})
+        plan_text = " ".join(
+            str(item) for key in ('data_requirements', 'research_tasks')
+            for item in implementation_plan.get(key, [])
+        ).lower()
+        if not plan_text:
+            return None
+        
+        collections = [c for c in get_stac_collections() if c.lower() in plan_text]
+        if not collections:
+            return None
+        
+        return {
+            "actions": [
+                {"action": "fetch_stac_sample_data", "parameters": {"collection": collection, "limit": 3}}
+                for collection in collections[:getattr(settings, 'AGENT_MAX_PARALLEL_TOOLS', 4)]
+            ],
+            "reasoning": f"Plan names configured STAC collections ({', '.join(collections)}); sampling them first",
+            "continue": True
+        }
+    
+    def _get_reasoning_messages(self, user_prompt: str) -> List[Dict[str, str]]:
+        """
+        Reasoning call messages. The first system message holds only instructions, tools,
+        data sources and templates, so it is identical across iterations and sessions and
+        OpenAI serves it from its prompt cache; the per-run plan and task follow in a second one.
+        """
+        system_prompts = self._reasoning_system_prompts
+        if not system_prompts:
+            system_prompts = (self._get_reasoning_instructions(), self._get_reasoning_plan_prompt())
+            if self.context.get('implementation_plan'):
+                self._reasoning_system_prompts = system_prompts
+        instructions, plan_prompt = system_prompts
+        return [
+            {"role": "system", "content": instructions},
+            {"role": "system", "content": plan_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+    
+    def _get_reasoning_instructions(self) -> str:
+        """Invariant part of the reasoning system prompt"""
+        return f"""
+        You are a REACT agent executing a planned disaster response application implementation.
         
         Available tools:
         {self._get_tools_description()}
@@ -310,106 +763,202 @@ class ReactAgent:
         3. At least 3 successful tool calls completed
         4. Confidence that the plan can be executed with gathered intelligence
         
-        Return a JSON object with:
-        - "reasoning": Your detailed thought process (reference the implementation plan)
-        - "action": Tool name to use (web_search, validate_api_endpoint, fetch_stac_sample_data, etc.)
-        - "parameters": Parameters for the tool
+        {STREAMED_REASONING_REPLY_KEYS if getattr(settings, 'AGENT_STREAM_REASONING', False) else REASONING_REPLY_KEYS}
         - "continue": true (always true until plan research is complete)
+        - "actions": Optional list of {{"action", "parameters"}} objects instead of a single action, for
+          independent tool calls that can run at the same time (e.g. sample data from several collections)
         """
+    
+    def _get_reasoning_plan_prompt(self) -> str:
+        """Per-run part of the reasoning system prompt: the implementation plan and task"""
+        implementation_plan = self.context.get('implementation_plan', {})
+        plan_summary = implementation_plan.get('summary', 'No plan available')
+        research_tasks = implementation_plan.get('research_tasks', [])
+        data_requirements = implementation_plan.get('data_requirements', [])
         
-        # Include previous context
-        context_summary = self._build_context_summary()
-        
-        user_prompt = f"""
-        Context so far:
-        {context_summary}
+        return f"""
+        IMPLEMENTATION PLAN:
+        {plan_summary}
         
-        Based on the implementation plan, what should I do next to complete the research phase?
+        DATA REQUIREMENTS:
+        {chr(10).join('- ' + req for req in data_requirements) if data_requirements else '- No specific requirements identified'}
         
-        Review the implementation plan and consider:
-        1. Which research tasks from the plan have I completed?
-        2. Which data requirements do I still need to validate?
-        3. What specific information is still missing to execute the plan?
-        4. Am I ready to generate the application based on the plan and gathered intelligence?
+        RESEARCH TASKS TO COMPLETE:
+        {chr(10).join('- ' + task for task in research_tasks) if research_tasks else '- No specific research tasks identified'}
         
-        Focus on completing the planned research systematically rather than random exploration.
+        Current task: {self.context['user_request']}
+        """
+    
+    def _log_prompt_cache_usage(self, usage):
+        """Debug-log how much of a prompt OpenAI served from its prefix cache"""
+        if usage is None or not logger.isEnabledFor(logging.DEBUG):
+            return
+        details = getattr(usage, 'prompt_tokens_details', None)
+        cached_tokens = getattr(details, 'cached_tokens', None) or 0
+        logger.debug("Reasoning prompt: %s tokens, %s from prompt cache", usage.prompt_tokens, cached_tokens)
+    
+    def _stream_reasoning(self, messages: List[Dict[str, str]]) -> str:
+        """
+        Stream the reasoning reply and start the chosen tool in a worker thread as soon as
+        its action and parameters are complete, overlapping it with the rest of the reply
+        """
+        stream = self.client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=messages,
+            temperature=0.3,
+            max_tokens=getattr(settings, 'AGENT_MAX_TOKENS_REASONING', 600),
+            response_format={"type": "json_object"},
+            stop=REASONING_STOP_SEQUENCES,
+            stream=True
+        )
         
-        Respond with valid JSON only.
+        content = ""
+        started = False
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            content += delta
+            
+            # Parameters can only be complete once a closing brace has arrived
+            if not started and '}' in delta:
+                started = self._start_streamed_tool(content)
+        
+        return content.strip()
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """
+        This agent's worker threads for tools and URL validation. Per agent, so time limits
+        aren't eaten by queueing behind other agents' work; one spare worker covers a streamed
+        prefetch or validation running next to a full parallel batch.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'AGENT_MAX_PARALLEL_TOOLS', 4) + 1,
+                thread_name_prefix='agent-tool'
+            )
+        return self._executor
+    
+    def _tool_timeout(self) -> float:
         """
+        Longest wait for work running in a worker. Tools' own HTTP timeouts normally fire
+        first; the extra allowance covers tools that make several requests.
+        """
+        return settings.AGENT_TOOL_TIMEOUT * 2
+    
+    def _timed_out_result(self, tool_name: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """Failed tool result recorded for a tool that didn't finish in time"""
+        logger.warning(f"Tool {tool_name} timed out")
+        return {
+            "success": False,
+            "error": "Tool timed out",
+            "tool": tool_name,
+            "parameters": parameters
+        }
+    
+    def _start_streamed_tool(self, partial_content: str) -> bool:
+        """Submit the tool named in a partial reasoning reply once its parameters are complete"""
+        if '"actions"' in partial_content:
+            return True  # Parallel batches are dispatched together once the reply is parsed
+        
+        action_match = STREAM_ACTION_PATTERN.search(partial_content)
+        parameters_match = STREAM_PARAMETERS_PATTERN.search(partial_content)
+        if not action_match or not parameters_match:
+            return False
         
         try:
-            self.llm_calls_made += 1
-            
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.3,
-                max_tokens=getattr(settings, 'AGENT_MAX_TOKENS_REASONING', 2000)
-            )
-            
-            content = response.choices[0].message.content.strip()
-            
-            # Clean JSON from markdown if present
-            if content.startswith('```json'):
-                content = content.replace('```json', '').replace('```', '').strip()
-            elif content.startswith('```'):
-                content = content.replace('```', '').strip()
-            
-            # Parse JSON with error handling
+            parameters = loads(find_json_object(partial_content[parameters_match.end():]))
+        except json.JSONDecodeError:
+            return False  # Parameters object not finished yet
+        
+        tool_name = action_match.group(1)
+        tool = tool_registry.get_tool(tool_name)
+        if tool and isinstance(parameters, dict):
+            future = self._get_executor().submit(_call_in_worker, self._run_tool_cached, tool, parameters)
+            self._prefetched_tool = (tool_name, parameters, future)
+        return True
+    
+    def _take_prefetched_result(self, tool_name: str, parameters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the result of a tool call started while streaming, if it matches this action"""
+        prefetched, self._prefetched_tool = self._prefetched_tool, None
+        if prefetched and prefetched[0] == tool_name and prefetched[1] == parameters:
             try:
-                action = json.loads(content)
-            except json.JSONDecodeError as e:
-                logger.error(f"JSON decode error in reasoning step: {e}")
-                # For reasoning steps, return a safe fallback
-                return {
+                return prefetched[2].result(timeout=self._tool_timeout())
+            except FuturesTimeoutError:
+                return self._timed_out_result(tool_name, parameters)
+        return None
+    
+    def _finalize_action(self, action: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply research requirements to an LLM-chosen action and record the reasoning step"""
+        # Enforce data source priority and minimum tool usage
+        successful_tool_calls = self._success_count
+        stac_calls_made = self._stac_success_count
+        
+        # Block HTML generation if insufficient research or no STAC data fetched
+        if action.get("action") == "generate_final_html":
+            if successful_tool_calls < 2:
+                self._log_message("agent", f"Blocked early HTML generation - only {successful_tool_calls} successful tool calls")
+                action = {
                     "action": "no_action",
-                    "reasoning": f"JSON parsing failed: {str(e)}",
+                    "reasoning": f"Insufficient research completed ({successful_tool_calls} successful tool calls). Must gather more intelligence using available tools before generating HTML.",
                     "continue": True
                 }
-            
-            # Enforce data source priority and minimum tool usage
-            successful_tool_calls = len([r for r in self.context["tool_results"] if r.get("result", {}).get("success", False)])
-            stac_calls_made = len([r for r in self.context["tool_results"] 
-                                 if r.get("action", {}).get("action") == "fetch_stac_sample_data" 
-                                 and r.get("result", {}).get("success", False)])
-            
-            # Block HTML generation if insufficient research or no STAC data fetched
-            if action.get("action") == "generate_final_html":
-                if successful_tool_calls < 2:
-                    self._log_message("agent", f"Blocked early HTML generation - only {successful_tool_calls} successful tool calls")
-                    action = {
-                        "action": "no_action",
-                        "reasoning": f"Insufficient research completed ({successful_tool_calls} successful tool calls). Must gather more intelligence using available tools before generating HTML.",
-                        "continue": True
-                    }
-                elif stac_calls_made == 0:
-                    self._log_message("agent", "Blocked HTML generation - must fetch STAC data from configured sources first")
-                    action = {
-                        "action": "no_action", 
-                        "reasoning": "Must fetch sample data from configured STAC sources before generating HTML. Use 'fetch_stac_sample_data' tool first to understand available data structure.",
-                        "continue": True
-                    }
-            
-            self._log_message("agent", f"Reasoning: {action.get('reasoning', '')}")
-            self.context["reasoning_steps"].append({
-                "iteration": self.iterations_completed,
-                "reasoning": action.get("reasoning", ""),
-                "action": action.get("action", ""),
-                "timestamp": timezone.now().isoformat()
-            })
-            
-            return action
-            
-        except Exception as e:
-            logger.error(f"Reasoning step failed: {e}")
-            return {
-                "action": "generate_final_html",
-                "reasoning": f"Error in reasoning: {str(e)}",
-                "continue": False
-            }
+            elif stac_calls_made == 0:
+                self._log_message("agent", "Blocked HTML generation - must fetch STAC data from configured sources first")
+                action = {
+                    "action": "no_action", 
+                    "reasoning": "Must fetch sample data from configured STAC sources before generating HTML. Use 'fetch_stac_sample_data' tool first to understand available data structure.",
+                    "continue": True
+                }
+        
+        self._log_message("agent", f"Reasoning: {action.get('reasoning', '')}")
+        self._queue_row(AgentReasoningStep(
+            session=self.session,
+            iteration=self.iterations_completed,
+            action=str(action.get("action", ""))[:100],
+            reasoning=action.get("reasoning", "")
+        ))
+        self.context["reasoning_steps"].append({
+            "iteration": self.iterations_completed,
+            "reasoning": action.get("reasoning", ""),
+            "action": action.get("action", ""),
+            "timestamp": self._iteration_timestamp or timezone.now().isoformat()
+        })
+        del self.context["reasoning_steps"][:-self.context_window]
+        
+        return action
+    
+    def _get_tool_actions(self, action: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Tool calls requested by a reasoning step, either a single action or an "actions" batch"""
+        batch = action.get("actions")
+        if not isinstance(batch, list):
+            batch = [action]
+        
+        tool_actions = [
+            a for a in batch
+            if isinstance(a, dict) and a.get("action") and a.get("action") not in ("no_action", "generate_final_html")
+        ]
+        return tool_actions[:getattr(settings, 'AGENT_MAX_PARALLEL_TOOLS', 4)]
+    
+    def _execute_tools(self, actions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Execute independent tool actions concurrently, returning results in action order"""
+        if len(actions) <= 1:
+            return [self._execute_tool(action) for action in actions]
+        
+        executor = self._get_executor()
+        futures = [executor.submit(_call_in_worker, self._execute_tool, action) for action in actions]
+        
+        # One shared deadline, so a hung tool can't hold up the batch
+        deadline = time.monotonic() + self._tool_timeout()
+        results = []
+        for action, future in zip(actions, futures):
+            try:
+                results.append(future.result(timeout=max(0, deadline - time.monotonic())))
+            except FuturesTimeoutError:
+                results.append(self._timed_out_result(action.get("action"), action.get("parameters", {})))
+        return results
     
     def _execute_tool(self, action: Dict[str, Any]) -> Dict[str, Any]:
         """Execute a tool based on the action"""
@@ -448,8 +997,9 @@ class ReactAgent:
                         "raw_parameters": str(parameters)
                     }
             
-            result = tool.execute(**parameters)
-            self._log_message("tool", f"Executed {tool_name}", {"parameters": parameters, "result": result})
+            result = self._take_prefetched_result(tool_name, parameters)
+            if result is None:
+                result = self._run_tool_cached(tool, parameters)
             return result
             
         except Exception as e:
@@ -459,9 +1009,29 @@ class ReactAgent:
                 "tool": tool_name,
                 "parameters": parameters
             }
-            self._log_message("tool", f"Tool {tool_name} failed: {str(e)}")
             return error_result
     
+    def _run_tool_cached(self, tool: AgentTool, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run a tool, reusing a successful result for identical parameters from this session or,
+        for read-only tools, from any session within AGENT_TOOL_CACHE_SECONDS
+        """
+        key = f"{tool.name}|{json.dumps(parameters, sort_keys=True, default=str)}"
+        if key in self._tool_cache:
+            return self._tool_cache[key]
+        
+        ttl = getattr(settings, 'AGENT_TOOL_CACHE_SECONDS', 300) if tool.cacheable else 0
+        shared_key = f"agent:tool:{hashlib.sha1(key.encode()).hexdigest()}"
+        result = cache.get(shared_key) if ttl > 0 else None
+        if result is None:
+            result = tool.execute(**parameters)
+            if ttl > 0 and result.get("success"):
+                cache.set(shared_key, result, ttl)
+        
+        if result.get("success"):
+            self._tool_cache[key] = result
+        return result
+    
     def _build_context_summary(self) -> str:
         """Build a summary of gathered context for the LLM"""
         summary_parts = []
@@ -469,13 +1039,7 @@ class ReactAgent:
         if self.context["tool_results"]:
             summary_parts.append("Information gathered:")
             for i, result in enumerate(self.context["tool_results"][-3:], 1):  # Last 3 results
-                action = result["action"]
-                tool_result = result["result"]
-                
-                if tool_result.get("success"):
-                    summary_parts.append(f"{i}. {action.get('action', 'Unknown')}: {self._summarize_tool_result(tool_result)}")
-                else:
-                    summary_parts.append(f"{i}. {action.get('action', 'Unknown')}: Failed - {tool_result.get('error', 'Unknown error')}")
+                summary_parts.append(f"{i}. {result['action'].get('action', 'Unknown')}: {result['summary']}")
         
         return "\n".join(summary_parts) if summary_parts else "No information gathered yet."
     
@@ -496,13 +1060,53 @@ class ReactAgent:
     
     def _get_tools_description(self) -> str:
         """Get description of available tools"""
-        tools = tool_registry.get_available_tools()
-        descriptions = []
-        
-        for tool_name, tool in tools.items():
-            descriptions.append(f"- {tool_name}: {tool.description}")
+        return tool_registry.get_tools_description()
+    
+    def _request_fingerprint(self) -> Optional[str]:
+        """
+        Key for the plan cache: the whitespace/case-normalized request plus the data
+        sources context, so plans are not reused after the configured sources change.
+        None for an empty request, which is never cached.
+        """
+        normalized = re.sub(r'\s+', ' ', self.context['user_request']).strip().lower()
+        if not normalized:
+            return None
+        return hashlib.sha1(f"{normalized}\n{self.context['available_data_sources']}".encode()).hexdigest()
+    
+    def _get_cached_plan(self) -> Optional[Dict[str, Any]]:
+        """Return a stored plan for an equivalent request, if one is still fresh"""
+        ttl_days = getattr(settings, 'AGENT_PLAN_CACHE_DAYS', 7)
+        if ttl_days <= 0:
+            return None
         
-        return "\n".join(descriptions)
+        key = self._request_fingerprint()
+        if key is None:
+            return None
+        cutoff = timezone.now() - timedelta(days=ttl_days)
+        plan = AgentPlanCache.objects.filter(key=key, created_at__gte=cutoff).values_list('plan', flat=True).first()
+        if plan:
+            AgentPlanCache.objects.filter(key=key).update(hit_count=F('hit_count') + 1)
+            self._log_message("agent", "Reusing cached implementation plan")
+        return plan
+    
+    def _store_cached_plan(self, plan: Dict[str, Any]):
+        """Remember a freshly generated plan for later equivalent requests, dropping expired ones"""
+        ttl_days = getattr(settings, 'AGENT_PLAN_CACHE_DAYS', 7)
+        key = self._request_fingerprint()
+        if ttl_days <= 0 or key is None:
+            return
+        
+        now = timezone.now()
+        _purge_expired(AgentPlanCache, now - timedelta(days=ttl_days))
+        AgentPlanCache.objects.update_or_create(
+            key=key,
+            defaults={
+                'user_request': self.context['user_request'],
+                'plan': plan,
+                'hit_count': 0,
+                'created_at': now
+            }
+        )
     
     def _create_implementation_plan(self) -> Dict[str, Any]:
         """
@@ -514,6 +1118,13 @@ class ReactAgent:
                 "error": "OpenAI client not available or LLM calls exhausted"
             }
         
+        cached_plan = self._get_cached_plan()
+        if cached_plan:
+            return {
+                "success": True,
+                "plan": cached_plan
+            }
+        
         system_prompt = f"""
         You are an expert disaster response application planner. Your job is to analyze user requests and create detailed implementation plans.
 
@@ -578,26 +1189,22 @@ class ReactAgent:
                     {"role": "user", "content": user_prompt}
                 ],
                 temperature=0.1,  # Lower temperature for more consistent planning
-                max_tokens=getattr(settings, 'AGENT_MAX_TOKENS_PLANNING', 2000)
+                max_tokens=getattr(settings, 'AGENT_MAX_TOKENS_PLANNING', 2000),
+                response_format={"type": "json_object"}
             )
             
             content = response.choices[0].message.content.strip()
             
-            # Clean JSON from markdown if present
-            if content.startswith('```json'):
-                content = content.replace('```json', '').replace('```', '').strip()
-            elif content.startswith('```'):
-                content = content.replace('```', '').strip()
-            
             # Parse JSON with error handling
             try:
-                plan = json.loads(content)
+                plan = extract_json(content)
+                self._store_cached_plan(plan)
                 return {
                     "success": True,
                     "plan": plan
                 }
             except json.JSONDecodeError as e:
-                logger.error(f"JSON decode error in planning step: {e}")
+                logger.error("JSON decode error in planning step: %s", e)
                 return {
                     "success": False,
                     "error": f"Failed to parse planning JSON: {str(e)}"
@@ -610,6 +1217,126 @@ class ReactAgent:
                 "error": str(e)
             }
     
+    def _plan_and_first_action(self) -> Dict[str, Any]:
+        """
+        Create the implementation plan and choose the first batch of independent research
+        calls in a single LLM call; later reasoning steps only fill gaps the results reveal
+        """
+        if not self.client or self.llm_calls_made >= self.max_llm_calls:
+            return {
+                "success": False,
+                "error": "OpenAI client not available or LLM calls exhausted"
+            }
+        
+        cached_plan = self._get_cached_plan()
+        if cached_plan:
+            # The first action is then chosen by the regular reasoning step
+            return {
+                "success": True,
+                "plan": cached_plan,
+                "first_action": None
+            }
+        
+        max_parallel_tools = getattr(settings, 'AGENT_MAX_PARALLEL_TOOLS', 4)
+        system_prompt = f"""
+        You are an expert disaster response application planner and REACT agent. First analyze the user request
+        and create a detailed implementation plan, then choose the first research steps to carry it out.
+
+        Available tools:
+        {self._get_tools_description()}
+
+        {self.context['available_data_sources']}
+
+        {self.context['available_templates']}
+
+        PLANNING REQUIREMENTS:
+        1. Parse the user request to understand exactly what they want
+        2. Define specific functional requirements 
+        3. Identify what data sources and APIs are needed
+        4. Plan the user interface and interaction design
+        5. Outline the technical implementation approach
+
+        FIRST ACTIONS REQUIREMENTS:
+        - List every research call from your plan that does not depend on another call's result
+          (up to {max_parallel_tools}); they run together and you review all results before the next step
+        - Prefer the configured data sources before external research
+        - Do NOT choose "generate_final_html" - research must come first
+        
+        Return ONLY a valid JSON object with this structure:
+        {{
+          "plan": {{
+            "summary": "Brief summary of what will be built",
+            "user_intent": "Clear interpretation of what the user wants",
+            "functional_requirements": ["Specific requirement 1", "Specific requirement 2"],
+            "data_requirements": ["Data source 1 needed", "Data source 2 needed"],
+            "ui_components": ["UI component 1 (e.g., interactive map)", "UI component 2 (e.g., data filters)"],
+            "research_tasks": ["Research task 1 to validate data availability", "Research task 2 to find current information"],
+            "success_criteria": ["Criteria 1 for successful implementation", "Criteria 2 for successful implementation"]
+          }},
+          "first_action": {{
+            "reasoning": "Your thought process (reference the plan)",
+            "actions": [
+              {{"action": "Tool name to use (web_search, validate_api_endpoint, fetch_stac_sample_data, etc.)", "parameters": {{}}}}
+            ],
+            "continue": true
+          }}
+        }}
+        """
+        
+        user_prompt = f"""
+        User Request: {self.context['user_request']}
+        
+        Create a detailed implementation plan for this request, then decide the first tools to run.
+        Be specific and actionable in your plan.
+        """
+        
+        try:
+            self.llm_calls_made += 1
+            
+            response = self.client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                temperature=0.1,
+                max_tokens=getattr(settings, 'AGENT_MAX_TOKENS_PLANNING', 2000) + getattr(settings, 'AGENT_MAX_TOKENS_REASONING', 600),
+                response_format={"type": "json_object"}
+            )
+            
+            content = response.choices[0].message.content.strip()
+            
+            try:
+                combined = extract_json(content)
+            except json.JSONDecodeError as e:
+                logger.error("JSON decode error in fused planning step: %s", e)
+                return {
+                    "success": False,
+                    "error": f"Failed to parse planning JSON: {str(e)}"
+                }
+            
+            plan = combined.get("plan") if isinstance(combined, dict) else None
+            if not isinstance(plan, dict):
+                return {
+                    "success": False,
+                    "error": "Planning response did not include a plan"
+                }
+            
+            self._store_cached_plan(plan)
+            first_action = combined.get("first_action")
+            return {
+                "success": True,
+                "plan": plan,
+                "first_action": first_action if isinstance(first_action, dict) else None
+            }
+                
+        except Exception as e:
+            logger.error(f"Fused planning step failed: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
     def _generate_final_html(self) -> Dict[str, Any]:
         """Generate the final HTML using all gathered intelligence"""
         if not self.client:
@@ -631,6 +1358,10 @@ class ReactAgent:
         system_prompt = f"""
         You are an expert web application developer implementing a planned application.
 
+        {self.context['available_data_sources']}
+
+        {FINAL_GENERATION_INSTRUCTIONS}
+
         IMPLEMENTATION PLAN TO EXECUTE:
         Summary: {plan_summary}
         
@@ -643,189 +1374,57 @@ class ReactAgent:
         SUCCESS CRITERIA:
         {chr(10).join('- ' + crit for crit in success_criteria) if success_criteria else '- Functional application with real data'}
 
-        {self.context['available_data_sources']}
-
         GATHERED INTELLIGENCE:
         {intelligence_summary}
-
-        Create a complete, functional webpage that IMPLEMENTS THE PLAN:
-        1. Fulfills ALL functional requirements from the implementation plan
-        2. Includes ALL specified UI components  
-        3. Uses the ACTUAL information you've gathered through research
-        4. Integrates with verified data sources and APIs
-        5. Meets the success criteria defined in the plan
-
-        ⚠️ CRITICAL URL REQUIREMENTS ⚠️:
-        - ONLY use EXACT API endpoints discovered through your research
-        - DO NOT modify, construct, or assume URL patterns
-        - Copy URLs EXACTLY from your tool results
-        - Add comments in JavaScript showing which research result provided each URL
-        - Include comprehensive error handling for all API calls
-        
-        ⚠️ CRITICAL GEOJSON/MAP HANDLING ⚠️:
-        - STAC GeoJSON often contains complex polygon geometries, not simple points
-        - For polygons: extract centroid or first coordinate pair for markers
-        - Always validate coordinates exist before creating markers
-        - Example coordinate extraction:
-        ```javascript
-        function getCoordinates(geometry) {{
-            if (geometry.type === 'Point') {{
-                return geometry.coordinates; // [lng, lat]
-            }} else if (geometry.type === 'Polygon') {{
-                return geometry.coordinates[0][0]; // First point of first ring
-            }}
-            return null; // Handle other types
-        }}
-        ```
-
-        ⚠️ CRITICAL TEMPLATE INJECTION UNDERSTANDING ⚠️:
-        Your generated content will be injected into this template structure:
-        
-        ```html
-        <!DOCTYPE html>
-        <html lang="en">
-        <head>
-            <meta charset="UTF-8">
-            <title>{{{{ title }}}}</title>
-            <link href="https://unpkg.com/leaflet/dist/leaflet.css" rel="stylesheet">
-            <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
-            <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css" rel="stylesheet">
-            <style>{{{{ custom_css }}}}</style>
-        </head>
-        <body>
-            {{{{ main_content }}}}
-            <script src="https://unpkg.com/leaflet/dist/leaflet.js"></script>
-            <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js"></script>
-            <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-            <script>{{{{ custom_js }}}}</script>
-        </body>
-        </html>
-        ```
-        
-        DO NOT generate <html>, <head>, or <body> tags - only the content that goes inside!
-        
-        Return ONLY a valid JSON object (no markdown, no explanations) with these exact fields:
-        {{
-          "title": "Specific, actionable page title based on research",
-          "description": "Clear description incorporating gathered intelligence", 
-          "main_content": "HTML body content ONLY (no html/head/body tags) with Bootstrap containers",
-          "custom_css": "CSS rules ONLY (no <style> tags)",
-          "custom_js": "JavaScript code ONLY (no <script> tags) with EXACT URLs from research"
-        }}
-        
-        🚨 CRITICAL JSON FORMATTING:
-        - Escape all backslashes in strings (use \\\\ for single \\)
-        - Escape all quotes in strings (use \\" for ")
-        - No line breaks inside JSON string values - use \\n instead
-        - Ensure all braces and brackets are properly matched
         """
         
         user_prompt = f"""
         CREATE A COMPREHENSIVE DISASTER RESPONSE APPLICATION FOR: {self.context['user_request']}
 
-        Use the intelligence I've gathered to create an accurate, functional application that incorporates:
-        - Current news and events from web research
-        - Validated API endpoints and data sources
-        - Real data structures and sample content
-        - Specific geographic information and coordinates
-        - Recent developments and current situation
-
-        🔗 URL VALIDATION REQUIREMENTS:
-        - Every API call must reference a URL from your research results
-        - Add JavaScript comments like: "// URL from STAC validation tool result"
-        - Include the exact collection names and parameters you discovered
-        - Use error handling: try/catch blocks with fallback messages
-        - No invented endpoints - only researched ones
-
-        🚨 LIBRARY USAGE EXAMPLES (all libraries are PRE-LOADED):
-        ```javascript
-        // MAPS (Leaflet is ready - MUST add OSM basemap):
-        const map = L.map('mapId').setView([lat, lng], zoom);
-        // REQUIRED: Add OpenStreetMap basemap to every map:
-        L.tileLayer('https://{{s}}.tile.openstreetmap.org/{{z}}/{{x}}/{{y}}.png', {{
-            attribution: '© OpenStreetMap contributors'
-        }}).addTo(map);
-        L.marker([lat, lng]).addTo(map).bindPopup('Info');
-        
-        // CHARTS (Chart.js is ready):
-        const ctx = document.getElementById('chartId').getContext('2d');
-        const chart = new Chart(ctx, {{ type: 'line', data: data }});
-        
-        // STYLING (Bootstrap is ready):
-        <div class="card">
-          <div class="card-header">Title</div>
-          <div class="card-body">Content</div>
-        </div>
-        ```
-
-        EXAMPLE of proper API call:
-        ```javascript
-        // URL validated by fetch_stac_sample_data tool - collection: gdacs-events
-        const stacUrl = 'https://montandon-eoapi-stage.ifrc.org/stac/search';
-        fetch(stacUrl + '?collections=gdacs-events&bbox=88,20,93,27')
-        ```
-
-        Make this a production-ready application that provides real value for disaster response.
+        {FINAL_GENERATION_USER_GUIDE}
         """
         
         try:
-            self.llm_calls_made += 1
-            
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
+            content = self._cached_completion(
+                system_prompt,
+                user_prompt,
                 temperature=0.7,
-                max_tokens=getattr(settings, 'AGENT_MAX_TOKENS_FINAL_GENERATION', 6000)
+                max_tokens=getattr(settings, 'AGENT_MAX_TOKENS_FINAL_GENERATION', 6000),
+                on_field=self.on_partial,
+                response_format=HTML_CONTENT_RESPONSE_FORMAT
             )
             
-            content = response.choices[0].message.content.strip()
-            
-            # Clean JSON from markdown if present
-            if content.startswith('```json'):
-                content = content.replace('```json', '').replace('```', '').strip()
-            elif content.startswith('```'):
-                content = content.replace('```', '').strip()
-            
-            # Parse JSON with better error handling for backslash issues
+            # JSON mode rules out fences and bad escapes; a decode error means a truncated reply
             try:
-                html_content = json.loads(content)
+                html_content = extract_json(content)
             except json.JSONDecodeError as e:
-                logger.error(f"JSON decode error: {e}")
-                logger.error(f"Problematic content around error: {content[max(0, e.pos-50):e.pos+50]}")
-                
-                # Try to fix common backslash issues
-                if "Invalid \\escape" in str(e):
-                    self._log_message("agent", "Attempting to fix JSON backslash escaping issues")
-                    try:
-                        # Replace common problematic patterns
-                        fixed_content = self._fix_json_escaping(content)
-                        html_content = json.loads(fixed_content)
-                        self._log_message("agent", "Successfully fixed JSON escaping issues")
-                    except Exception as fix_error:
-                        logger.error(f"Could not fix JSON escaping: {fix_error}")
-                        raise e
-                else:
-                    raise e
+                logger.error("JSON decode error: %s", e)
+                if logger.isEnabledFor(logging.ERROR):
+                    logger.error("Problematic content around error: %s", content[max(0, e.pos-50):e.pos+50])
+                raise
             
-            # Validate required fields
-            required_fields = ['title', 'description', 'main_content', 'custom_css', 'custom_js']
-            for field in required_fields:
-                if field not in html_content:
-                    html_content[field] = ""
+            # Fill in any missing required fields
+            html_content = {**EMPTY_HTML_CONTENT, **html_content}
             
             self._log_message("agent", "Generated final HTML content")
             
+            # Validate URLs in generated content (network-bound) in a worker while the
+            # HTML/JavaScript validation runs; it checks a copy, as validation may replace fields
+            url_validation_future = self._get_executor().submit(
+                _call_in_worker, self._validate_generated_urls, dict(html_content)
+            )
+            
             # Validate and fix HTML/JavaScript issues
             validation_result = self._validate_and_fix_html(html_content)
             if validation_result.get("content_fixed"):
                 html_content = validation_result["html_content"]
                 self._log_message("agent", f"Applied validation fixes: {validation_result.get('message', 'Content improved')}")
             
-            # Validate URLs in generated content
-            url_validation_result = self._validate_generated_urls(html_content)
+            try:
+                url_validation_result = url_validation_future.result(timeout=self._tool_timeout())
+            except FuturesTimeoutError:
+                logger.warning("URL validation timed out; keeping generated URLs unchecked")
+                url_validation_result = {}
             
             # If we have invalid URLs and haven't exceeded LLM call limit, try to fix them
             if (url_validation_result.get("has_invalid_urls") and 
@@ -840,7 +1439,7 @@ class ReactAgent:
             return {
                 "success": True,
                 "html_content": html_content,
-                "intelligence_used": len(self.context["tool_results"]),
+                "intelligence_used": self._tool_result_count,
                 "iterations_completed": self.iterations_completed,
                 "llm_calls_made": self.llm_calls_made,
                 "html_validation": validation_result,
@@ -856,74 +1455,184 @@ class ReactAgent:
                 "context": self.context
             }
     
-    def _build_intelligence_summary(self) -> str:
-        """Build a comprehensive summary of all gathered intelligence"""
-        summary_parts = ["RESEARCH FINDINGS:"]
+    def _cached_completion(self, system_prompt: str, user_prompt: str, temperature: float,
+                           max_tokens: int, model: str = "gpt-4o-mini",
+                           on_field: Optional[Callable[[str, str], None]] = None,
+                           response_format: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Chat completion text, reused from AgentCompletionCache (fronted by an in-process LRU) when
+        the same whitespace-normalized prompts were answered within AGENT_COMPLETION_CACHE_HOURS.
+        Only replies that parse as JSON are stored, so a malformed generation is never served again.
+        Only a cache miss counts towards llm_calls_made.
+        on_field receives each top-level string field of the reply as soon as it is complete.
+        """
+        ttl_hours = getattr(settings, 'AGENT_COMPLETION_CACHE_HOURS', 24)
+        key = None
+        if ttl_hours > 0:
+            normalized = "|".join(re.sub(r'\s+', ' ', prompt).strip() for prompt in (system_prompt, user_prompt))
+            key = hashlib.sha256(f"{model}|{temperature}|{max_tokens}|{normalized}".encode()).hexdigest()
+            cutoff = timezone.now() - timedelta(hours=ttl_hours)
+            cached = _memo_get_completion(key, cutoff)
+            if cached is None:
+                row = AgentCompletionCache.objects.filter(key=key, created_at__gte=cutoff).values_list('created_at', 'content').first()
+                if row:
+                    _memo_put_completion(key, *row)
+                    cached = row[1]
+            if cached is not None:
+                self._log_message("agent", "Reusing cached LLM completion")
+                if on_field:
+                    for field, value in extract_json(cached).items():
+                        if isinstance(value, str):
+                            on_field(field, value)
+                return cached
+        
+        self.llm_calls_made += 1
+        content = self._stream_json_completion(
+            system_prompt, user_prompt, temperature, max_tokens, model, on_field, response_format
+        )
         
-        for i, result in enumerate(self.context["tool_results"], 1):
-            action = result["action"]
-            tool_result = result["result"]
-            action_name = action.get("action", "Unknown")
-            
-            summary_parts.append(f"\n{i}. {action_name.upper()}:")
-            
-            if tool_result.get("success"):
-                if action_name == "web_search":
-                    query = action.get("parameters", {}).get("query", "")
-                    results = tool_result.get("results", [])
-                    summary_parts.append(f"   Query: {query}")
-                    summary_parts.append(f"   Found {len(results)} current results:")
-                    for j, r in enumerate(results[:3], 1):
-                        summary_parts.append(f"   {j}. {r.get('title', '')}")
-                        summary_parts.append(f"      {r.get('description', '')[:100]}...")
-                        summary_parts.append(f"      Source: {r.get('url', '')}")
-                
-                elif action_name == "fetch_stac_sample_data":
-                    collection = tool_result.get("collection", "")
-                    total = tool_result.get("total_found", 0)
-                    props = tool_result.get("available_properties", [])
-                    summary_parts.append(f"   Collection: {collection}")
-                    summary_parts.append(f"   Found {total} data items")
-                    summary_parts.append(f"   Available properties: {', '.join(props[:10])}")
-                
-                elif action_name == "validate_api_endpoint":
-                    url = tool_result.get("url", "")
-                    accessible = tool_result.get("is_accessible", False)
-                    status = tool_result.get("status_code", "unknown")
-                    summary_parts.append(f"   URL: {url}")
-                    summary_parts.append(f"   Status: {status} ({'accessible' if accessible else 'not accessible'})")
-            else:
-                error = tool_result.get("error", "Unknown error")
-                summary_parts.append(f"   FAILED: {error}")
+        if key:
+            try:
+                extract_json(content)
+            except json.JSONDecodeError:
+                return content
+            created_at = timezone.now()
+            # Expired rows are never read again; clear them out periodically so the table stays bounded
+            _purge_expired(AgentCompletionCache, cutoff)
+            AgentCompletionCache.objects.update_or_create(
+                key=key,
+                defaults={'content': content, 'created_at': created_at}
+            )
+            _memo_put_completion(key, created_at, content)
+        return content
+    
+    def _stream_json_completion(self, system_prompt: str, user_prompt: str, temperature: float,
+                                max_tokens: int, model: str,
+                                on_field: Optional[Callable[[str, str], None]] = None,
+                                response_format: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Stream a JSON-mode (or given structured output) completion and stop reading as soon
+        as the object closes, instead of waiting for trailing text and the end of the stream
+        """
+        stream = self.client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            response_format=response_format or {"type": "json_object"},
+            stream=True
+        )
+        
+        parts = []
+        tracker = JSONObjectTracker(capture_fields=on_field is not None)
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                parts.append(delta)
+                closed = tracker.feed(delta)
+                if on_field:
+                    for field, value in tracker.take_fields():
+                        on_field(field, value)
+                if closed:
+                    break
+        finally:
+            stream.close()
         
-        if not self.context["tool_results"]:
-            summary_parts.append("No additional research conducted.")
+        return "".join(parts).strip()
+    
+    def _build_intelligence_summary(self) -> str:
+        """
+        Build a summary of gathered intelligence that fits in AGENT_MAX_CONTEXT_TOKENS.
+        Successful and then more recent results are kept first; failures are placed mid-block.
+        Cached until another tool result is recorded.
+        """
+        if self._summary_cache and self._summary_cache[0] == self._tool_result_count:
+            return self._summary_cache[1]
         
-        return "\n".join(summary_parts)
+        summary = self._pack_intelligence_summary()
+        self._summary_cache = (self._tool_result_count, summary)
+        return summary
     
-    def _fix_json_escaping(self, content: str) -> str:
-        """Fix common JSON escaping issues in LLM-generated content"""
-        import re
-        
-        # Common problematic patterns in JavaScript that break JSON
-        fixes = [
-            # Fix unescaped backslashes in regex patterns
-            (r'\\s\+', r'\\\\s\\+'),  # \s+ -> \\s\\+
-            (r'\\w\+', r'\\\\w\\+'),  # \w+ -> \\w\\+
-            (r'\\d\+', r'\\\\d\\+'),  # \d+ -> \\d\\+
-            (r'\\n', r'\\\\n'),        # \n -> \\n
-            (r'\\t', r'\\\\t'),        # \t -> \\t
-            (r'\\r', r'\\\\r'),        # \r -> \\r
-            
-            # Fix unescaped backslashes in URLs and paths
-            (r'([^\\])\\([^\\"])', r'\1\\\\\\2'),  # Single backslash -> double backslash
+    def _pack_intelligence_summary(self) -> str:
+        """Format all stored tool results and keep the highest-priority ones within the token budget"""
+        raw_results = self._raw_tool_results()
+        if not raw_results:
+            return "RESEARCH FINDINGS:\nNo additional research conducted."
+        
+        sections = [
+            (i, success, self._summarize_research_result(i, action, success, tool_result))
+            for i, (action, success, tool_result) in enumerate(raw_results, 1)
         ]
         
-        fixed_content = content
-        for pattern, replacement in fixes:
-            fixed_content = re.sub(pattern, replacement, fixed_content)
+        budget = getattr(settings, 'AGENT_MAX_CONTEXT_TOKENS', 6000)
+        kept = set()
+        used = 0
+        for i, success, text in sorted(sections, key=lambda section: (section[1], section[0]), reverse=True):
+            tokens = count_tokens(text)
+            if used + tokens > budget:
+                continue
+            kept.add(i)
+            used += tokens
+        
+        # Failed calls carry the least signal, so they go in the middle of the block where models
+        # attend least; successful findings open and close it. Each part stays in call order.
+        successes = [text for i, success, text in sections if i in kept and success]
+        failures = [text for i, success, text in sections if i in kept and not success]
+        half = (len(successes) + 1) // 2
         
-        return fixed_content
+        summary_parts = ["RESEARCH FINDINGS:"]
+        summary_parts.extend(successes[:half])
+        summary_parts.extend(failures)
+        summary_parts.extend(successes[half:])
+        omitted = len(sections) - len(kept)
+        if omitted:
+            summary_parts.append(f"\n({omitted} older or failed results omitted to fit the context budget)")
+        
+        return "\n".join(summary_parts)
+    
+    def _summarize_research_result(self, i: int, action: Dict[str, Any], success: bool,
+                                   tool_result: Dict[str, Any]) -> str:
+        """Format one tool result for the final generation prompt"""
+        action_name = action.get("action", "Unknown")
+        summary_parts = [f"\n{i}. {action_name.upper()}:"]
+        
+        if success:
+            if action_name == "web_search":
+                query = action.get("parameters", {}).get("query", "")
+                results = tool_result.get("results", [])
+                summary_parts.append(f"   Query: {query}")
+                summary_parts.append(f"   Found {len(results)} current results:")
+                for j, r in enumerate(results[:3], 1):
+                    summary_parts.append(f"   {j}. {r.get('title', '')}")
+                    summary_parts.append(f"      {r.get('description', '')[:100]}...")
+                    summary_parts.append(f"      Source: {r.get('url', '')}")
+            
+            elif action_name == "fetch_stac_sample_data":
+                collection = tool_result.get("collection", "")
+                total = tool_result.get("total_found", 0)
+                props = tool_result.get("available_properties", [])
+                summary_parts.append(f"   Collection: {collection}")
+                summary_parts.append(f"   Found {total} data items")
+                summary_parts.append(f"   Available properties: {', '.join(props[:10])}")
+            
+            elif action_name == "validate_api_endpoint":
+                url = tool_result.get("url", "")
+                accessible = tool_result.get("is_accessible", False)
+                status = tool_result.get("status_code", "unknown")
+                summary_parts.append(f"   URL: {url}")
+                summary_parts.append(f"   Status: {status} ({'accessible' if accessible else 'not accessible'})")
+        else:
+            error = tool_result.get("error", "Unknown error")
+            summary_parts.append(f"   FAILED: {error}")
+        
+        return "\n".join(summary_parts)
     
     def _validate_and_fix_html(self, html_content: Dict[str, Any]) -> Dict[str, Any]:
         """Validate and potentially fix HTML/JavaScript issues"""
@@ -968,23 +1677,28 @@ class ReactAgent:
             if html_content.get("custom_css"):
                 combined_content += "<style>" + html_content["custom_css"] + "</style>\n"
             
+            # Extract URLs once per distinct content; the validator is handed the list, not the HTML
+            content_hash = hash(combined_content)
+            if self._url_extraction and self._url_extraction[0] == content_hash:
+                urls = self._url_extraction[1]
+            else:
+                urls = validate_tool.extract_urls(combined_content)
+                self._url_extraction = (content_hash, urls)
+            
             # Run validation
-            validation_result = validate_tool.execute({
-                "html_content": combined_content
-            })
+            validation_result = validate_tool.execute(urls=urls)
             
-            self._log_message("tool", f"URL validation completed: found {len(validation_result.get('endpoints', []))} URLs")
+            self._log_message("tool", f"URL validation completed: found {validation_result.get('urls_found', 0)} URLs")
             
             # Determine if there are invalid URLs
             invalid_urls = []
-            if validation_result.get("success") and validation_result.get("endpoints"):
-                for endpoint_data in validation_result["endpoints"]:
-                    if not endpoint_data.get("is_accessible", True):
-                        invalid_urls.append({
-                            "url": endpoint_data.get("url"),
-                            "status": endpoint_data.get("status_code"),
-                            "error": endpoint_data.get("error_message")
-                        })
+            if validation_result.get("success"):
+                for endpoint_data in validation_result.get("invalid_urls", []):
+                    invalid_urls.append({
+                        "url": endpoint_data.get("url"),
+                        "status": endpoint_data.get("status_code"),
+                        "error": endpoint_data.get("error")
+                    })
             
             validation_result["has_invalid_urls"] = len(invalid_urls) > 0
             validation_result["invalid_urls"] = invalid_urls
@@ -1006,26 +1720,32 @@ class ReactAgent:
         
         try:
             # Build specific feedback about invalid URLs
-            invalid_urls_info = []
-            for invalid in validation_result["invalid_urls"]:
-                url_info = f"❌ {invalid['url']}"
-                if invalid.get('status'):
-                    url_info += f" (Status: {invalid['status']})"
-                if invalid.get('error'):
-                    url_info += f" - {invalid['error']}"
-                invalid_urls_info.append(url_info)
+            invalid_urls_text = "\n".join(
+                f"❌ {invalid['url']}"
+                + (f" (Status: {invalid['status']})" if invalid.get('status') else "")
+                + (f" - {invalid['error']}" if invalid.get('error') else "")
+                for invalid in validation_result["invalid_urls"]
+            )
             
-            # Get intelligence about valid URLs from our research
-            valid_urls_from_research = []
-            for result in self.context["tool_results"]:
-                tool_result = result["result"]
-                if tool_result.get("success"):
-                    # Extract valid URLs from STAC data results
-                    if "base_url" in tool_result and tool_result.get("is_accessible"):
-                        valid_urls_from_research.append(f"✅ {tool_result['base_url']} - Validated STAC endpoint")
-                    # Extract valid URLs from API validation results
-                    elif "url" in tool_result and tool_result.get("is_accessible"):
-                        valid_urls_from_research.append(f"✅ {tool_result['url']} - Validated API endpoint")
+            # Get intelligence about valid URLs from our research (STAC data, then API validation results)
+            valid_urls_text = "\n".join(
+                f"✅ {tool_result['base_url']} - Validated STAC endpoint" if "base_url" in tool_result
+                else f"✅ {tool_result['url']} - Validated API endpoint"
+                for _, success, tool_result in self._raw_tool_results()
+                if success and tool_result.get("is_accessible") and ("base_url" in tool_result or "url" in tool_result)
+            ) or "No confirmed valid URLs found in research"
+            
+            # Only send the code fields that contain a failing URL; the rest is merged back unchanged
+            code_fields = ('main_content', 'custom_js', 'custom_css')
+            fields_to_fix = {
+                field: html_content.get(field, "") for field in code_fields
+                if any(invalid['url'] and invalid['url'] in html_content.get(field, "")
+                       for invalid in validation_result["invalid_urls"])
+            }
+            if not fields_to_fix:
+                # URLs assembled at runtime don't appear verbatim - send all the code
+                fields_to_fix = {field: html_content.get(field, "") for field in code_fields}
+            fields_json = dumps(fields_to_fix)
             
             system_prompt = """
             You are fixing invalid URLs in disaster response application code. The user has provided you with:
@@ -1039,18 +1759,18 @@ class ReactAgent:
             - Add proper error handling and fallback messages
             - Keep all other content exactly the same
             
-            Return ONLY the corrected JSON with the same structure (title, description, main_content, custom_css, custom_js).
+            Return ONLY the corrected JSON with exactly the same keys you were given.
             """
             
             user_prompt = f"""
             INVALID URLs DETECTED:
-            {chr(10).join(invalid_urls_info)}
+            {invalid_urls_text}
             
             VALID URLs FROM RESEARCH:
-            {chr(10).join(valid_urls_from_research) if valid_urls_from_research else "No confirmed valid URLs found in research"}
+            {valid_urls_text}
             
-            CURRENT HTML CONTENT TO FIX:
-            {json.dumps(html_content, indent=2)}
+            CURRENT CONTENT TO FIX:
+            {fields_json}
             
             Please fix the invalid URLs by:
             1. Replacing them with valid alternatives from research if available
@@ -1058,42 +1778,36 @@ class ReactAgent:
             3. Including fallback messages like "Data source temporarily unavailable"
             4. Commenting out or removing calls that cannot be fixed
             
-            Keep the title, description, and overall structure identical. Only fix the URL issues.
+            Keep the overall structure identical. Only fix the URL issues.
             """
             
-            self.llm_calls_made += 1
+            # The reply echoes the content with URLs swapped, so size the budget from the input
+            max_tokens = min(
+                getattr(settings, 'AGENT_MAX_TOKENS_FINAL_GENERATION', 6000),
+                int(count_tokens(fields_json) * 1.15) + 200
+            )
             
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
+            content = self._cached_completion(
+                system_prompt,
+                user_prompt,
                 temperature=0.3,  # Lower temperature for more precise fixes
-                max_tokens=getattr(settings, 'AGENT_MAX_TOKENS_FINAL_GENERATION', 6000)
+                max_tokens=max_tokens
             )
             
-            content = response.choices[0].message.content.strip()
-            
-            # Clean JSON from markdown if present
-            if content.startswith('```json'):
-                content = content.replace('```json', '').replace('```', '').strip()
-            elif content.startswith('```'):
-                content = content.replace('```', '').strip()
-            
             # Parse JSON with error handling
             try:
-                fixed_html = json.loads(content)
+                fixed_fields = extract_json(content)
             except json.JSONDecodeError as e:
-                logger.error(f"JSON decode error in URL fixing: {e}")
+                logger.error("JSON decode error in URL fixing: %s", e)
                 # If JSON parsing fails, return None to indicate fix failed
                 return None
             
-            # Validate that we still have the required structure
-            required_fields = ['title', 'description', 'main_content', 'custom_css', 'custom_js']
-            for field in required_fields:
-                if field not in fixed_html:
-                    fixed_html[field] = html_content.get(field, "")
+            # Merge the fixed fields into a copy of the original content
+            fixed_html = dict(html_content)
+            fixed_html.update(
+                (field, value) for field, value in fixed_fields.items()
+                if field in fields_to_fix and isinstance(value, str)
+            )
             
             return fixed_html
             
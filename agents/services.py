@@ -1,54 +1,65 @@
 try:
-    from openai import OpenAI
+    from openai import OpenAI, DefaultHttpxClient
+    import httpx
     openai_available = True
 except ImportError:
-    OpenAI = None
+    OpenAI = DefaultHttpxClient = httpx = None
     openai_available = False
 
+try:
+    import h2  # noqa: F401 - lets httpx negotiate HTTP/2
+    http2_available = True
+except ImportError:
+    http2_available = False
+
 from django.conf import settings
 from typing import Dict, Any, Optional
+import functools
 import json
 
+from .contexts import get_datasets_context
+from .json_utils import extract_json
+
+# Fields every generated page payload carries; missing ones default to empty strings
+EMPTY_HTML_CONTENT = dict.fromkeys(('title', 'description', 'main_content', 'custom_css', 'custom_js'), "")
+
+
+@functools.lru_cache(maxsize=1)
+def _shared_openai_client(api_key: str):
+    # httpx closes idle connections after 5s by default, which is shorter than a typical
+    # tool call between two agent LLM requests; keep them long enough to skip the TLS handshake
+    http_client = DefaultHttpxClient(
+        http2=http2_available,
+        limits=httpx.Limits(
+            max_connections=16,
+            max_keepalive_connections=8,
+            keepalive_expiry=getattr(settings, 'OPENAI_KEEPALIVE_SECONDS', 60)
+        )
+    )
+    # The SDK retries rate limits, 5xx, timeouts and connection errors with exponential backoff
+    return OpenAI(
+        api_key=api_key,
+        http_client=http_client,
+        max_retries=getattr(settings, 'OPENAI_MAX_RETRIES', 3)
+    )
+
+
+def get_openai_client():
+    """Process-wide OpenAI client, so every agent and service shares one connection pool"""
+    if not (openai_available and settings.OPENAI_API_KEY):
+        return None
+    return _shared_openai_client(settings.OPENAI_API_KEY)
+
 
 class LLMService:
     """Basic LLM service for generating HTML content"""
     
     def __init__(self):
-        self.client = None
-        if openai_available and settings.OPENAI_API_KEY:
-            self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.client = get_openai_client()
     
     def get_available_datasets_context(self) -> str:
         """Get rich context about available datasets for LLM prompt"""
-        from datasets.models import DataSource
-        
-        active_sources = DataSource.objects.filter(is_active=True).order_by('category', 'name')
-        
-        if not active_sources.exists():
-            return "No configured data sources available. Please configure DataSources first."
-        
-        context_parts = ["AVAILABLE DATA SOURCES (integrate these real APIs):"]
-        
-        current_category = None
-        for source in active_sources:
-            if source.category != current_category:
-                current_category = source.category
-                category_name = dict(source.CATEGORY_CHOICES).get(source.category, source.category)
-                context_parts.append(f"\n**{category_name.upper()}:**")
-            
-            # Get the detailed LLM context for each source
-            source_context = source.get_llm_context_summary()
-            context_parts.append(f"• {source_context}")
-            
-            # Add query patterns if available
-            if source.query_patterns:
-                context_parts.append("  Query patterns:")
-                for pattern in source.query_patterns[:2]:  # Limit to first 2 patterns
-                    context_parts.append(f"    - {pattern.get('name', 'Query')}: {pattern.get('template', '')}")
-            
-            context_parts.append("")  # Empty line for readability
-        
-        return "\n".join(context_parts)
+        return get_datasets_context()
     
     def generate_html_content(self, user_request: str, template_context: Dict[str, Any] = None) -> Dict[str, Any]:
         """
@@ -129,23 +140,10 @@ class LLMService:
             
             content = response.choices[0].message.content.strip()
             
-            # Extract JSON from markdown code blocks if present
-            if content.startswith('```json'):
-                content = content.replace('```json', '').replace('```', '').strip()
-            elif content.startswith('```'):
-                content = content.replace('```', '').strip()
-            
             # Try to parse as JSON, fallback to structured response
             try:
-                parsed_content = json.loads(content)
-                
-                # Validate required fields
-                required_fields = ['title', 'description', 'main_content', 'custom_css', 'custom_js']
-                for field in required_fields:
-                    if field not in parsed_content:
-                        parsed_content[field] = ""
-                
-                return parsed_content
+                # Fill in any missing required fields
+                return {**EMPTY_HTML_CONTENT, **extract_json(content)}
                 
             except json.JSONDecodeError as e:
                 print(f"JSON Parse Error: {e}")
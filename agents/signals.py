@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from datasets.models import DataSource
+from generator.models import HTMLTemplate
+from .contexts import invalidate_contexts
+
+
+@receiver([post_save, post_delete], sender=DataSource)
+@receiver([post_save, post_delete], sender=HTMLTemplate)
+def invalidate_prompt_contexts(sender, **kwargs):
+    """Rebuild cached agent prompt contexts after data sources or templates change"""
+    invalidate_contexts()
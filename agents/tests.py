@@ -1,3 +1,331 @@
-from django.test import TestCase
+import json
+import random
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+
+from .json_utils import JSONObjectTracker, extract_json
+from .models import AgentSession, AgentToolResult
+from .react_agent import ReactAgent, completion_memo
+
+
+LEGACY_TOOL_RESULTS = [
+    {
+        "iteration": 1,
+        "action": {"action": "web_search", "parameters": {"query": "floods"}},
+        "result": {"success": True, "results": [{"title": "Flood report"}]},
+        "timestamp": "2025-01-01T00:00:00"
+    },
+    {
+        "iteration": 2,
+        "action": {"action": "fetch_stac_sample_data", "parameters": {"collection": "gdacs-events"}},
+        "result": {"success": False, "error": "timeout"},
+        "timestamp": "2025-01-01T00:00:05"
+    },
+    "not a dict",
+]
+
+
+# Escaped quotes, braces inside strings, a backslash, a \u escape and non-string values
+STREAMED_REPLY = {
+    "title": 'Quake "watch" map',
+    "main_content": '<div class="map">{{ not a block }}</div>\n',
+    "meta": {"nested": "not reported", "list": ["x", "}"]},
+    "custom_js": "const re = /\\d+/; if (a) { b(); }",
+    "version": 2,
+    "description": "Caf\u00e9 \\ done",
+}
+STREAMED_TEXT = json.dumps(STREAMED_REPLY)
+STREAMED_FIELDS = [(key, value) for key, value in STREAMED_REPLY.items() if isinstance(value, str)]
+
+
+def random_chunks(text, rng, max_size=12):
+    """Split text into chunks of random length"""
+    chunks = []
+    i = 0
+    while i < len(text):
+        size = rng.randint(1, max_size)
+        chunks.append(text[i:i + size])
+        i += size
+    return chunks
+
+
+class FakeStream:
+    """Stand-in for an OpenAI completion stream that records how far it was read"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.consumed = 0
+        self.closed = False
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.consumed += 1
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=chunk))])
+
+    def close(self):
+        self.closed = True
+
+
+def make_agent(session_id=None):
+    """ReactAgent without an OpenAI client, for exercising its persistence"""
+    with mock.patch('agents.react_agent.get_openai_client', return_value=None):
+        return ReactAgent(session_id)
+
+
+class PopulateToolResultsMigrationTest(TransactionTestCase):
+    """0005 copies the tool_results kept in session context into AgentToolResult rows"""
+
+    migrate_from = [('agents', '0004_agenttoolresult')]
+    migrate_to = [('agents', '0005_populate_agenttoolresult')]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        old_apps = executor.loader.project_state(self.migrate_from).apps
+        OldSession = old_apps.get_model('agents', 'AgentSession')
+        self.session_id = OldSession.objects.create(
+            session_id='legacy', context={"tool_results": LEGACY_TOOL_RESULTS}, current_task='floods'
+        ).pk
+        OldSession.objects.create(session_id='empty', context={}, current_task='')
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(self.migrate_to)
+        self.apps = executor.loader.project_state(self.migrate_to).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_tool_results_copied(self):
+        ToolResult = self.apps.get_model('agents', 'AgentToolResult')
+        rows = list(ToolResult.objects.order_by('idx').values_list(
+            'session_id', 'idx', 'iteration', 'success', 'action', 'result'
+        ))
+        self.assertEqual(rows, [
+            (self.session_id, 0, 1, True, LEGACY_TOOL_RESULTS[0]["action"], LEGACY_TOOL_RESULTS[0]["result"]),
+            (self.session_id, 1, 2, False, LEGACY_TOOL_RESULTS[1]["action"], LEGACY_TOOL_RESULTS[1]["result"]),
+        ])
+
+
+class LegacySessionLoadTest(TestCase):
+    def test_legacy_entries_compacted_on_load(self):
+        AgentSession.objects.create(
+            session_id='legacy', context={"tool_results": LEGACY_TOOL_RESULTS}, current_task='floods'
+        )
+        agent = make_agent('legacy')
+
+        results = agent.context["tool_results"]
+        self.assertEqual(len(results), 2)
+        self.assertEqual([entry["iteration"] for entry in results], [1, 2])
+        self.assertEqual([entry["success"] for entry in results], [True, False])
+        self.assertEqual(results[1]["summary"], "Failed - timeout")
+        self.assertEqual(results[0]["action"], LEGACY_TOOL_RESULTS[0]["action"])
+        self.assertNotIn("result", results[0])
+
+
+class ToolResultRowTest(TestCase):
+    def test_rows_numbered_in_order(self):
+        agent = make_agent('numbered')
+        for success in (True, False, True):
+            agent._create_tool_result_row({"action": "web_search"}, success, {"success": success})
+
+        self.assertIsNotNone(agent.session.pk)
+        self.assertEqual(
+            list(agent.session.tool_results.order_by('idx').values_list('idx', 'success')),
+            [(0, True), (1, False), (2, True)]
+        )
+
+    def test_idx_clash_retries_after_last_row(self):
+        agent = make_agent('shared')
+        agent._insert_session()
+        # Another agent on the same session already took idx 0 and 1
+        for idx in (0, 1):
+            AgentToolResult.objects.create(
+                session=agent.session, idx=idx, iteration=0, action={}, success=True, result={}
+            )
+        self.assertEqual(agent._tool_result_count, 0)
+
+        row = agent._create_tool_result_row({"action": "web_search"}, True, {"success": True})
+
+        self.assertEqual(row.idx, 2)
+        self.assertEqual(agent._tool_result_count, 3)
+        self.assertEqual(agent.session.tool_results.count(), 3)
+
+    def test_resumed_agent_continues_numbering(self):
+        agent = make_agent('resumed')
+        agent._create_tool_result_row({"action": "web_search"}, True, {"success": True})
+        agent.context["tool_results"].append({"iteration": 0, "action": {}, "success": True, "summary": ""})
+        agent._save_session()
+
+        resumed = make_agent('resumed')
+        self.assertEqual(resumed._tool_result_count, 1)
+        self.assertEqual(resumed._success_count, 1)
+
+
+class GeneratorCommandsToolResultsTest(TestCase):
+    def setUp(self):
+        self.session = AgentSession.objects.create(session_id='inspect', context={}, current_task='floods')
+        AgentToolResult.objects.create(
+            session=self.session, idx=0, iteration=1,
+            action={"action": "web_search", "parameters": {"query": "floods"}},
+            success=True, result={"success": True, "results": [{"title": "a"}, {"title": "b"}]}
+        )
+        AgentToolResult.objects.create(
+            session=self.session, idx=1, iteration=2,
+            action={"action": "fetch_stac_sample_data", "parameters": {}},
+            success=False, result={"success": False, "error": "collection not found"}
+        )
+
+    def test_inspect_agent_session(self):
+        out = StringIO()
+        call_command('inspect_agent_session', 'inspect', '--show-tool-results', stdout=out)
+        output = out.getvalue()
+
+        self.assertIn("Tool results: 2", output)
+        self.assertIn("Successful tools: 1/2", output)
+        self.assertIn("web_search", output)
+        self.assertIn("Found 2 items", output)
+
+    def test_analyze_tool_failures(self):
+        out = StringIO()
+        call_command('analyze_generation_failures', '--tool-failures', stdout=out)
+        output = out.getvalue()
+
+        self.assertIn("web_search: 100.0% (1/1)", output)
+        self.assertIn("fetch_stac_sample_data: 0.0% (0/1)", output)
+        self.assertIn("fetch_stac_sample_data: collection not found", output)
+
+
+class JSONObjectTrackerTest(TestCase):
+    def feed_all(self, chunks):
+        tracker = JSONObjectTracker(capture_fields=True)
+        fields = []
+        closed_at = None
+        for i, chunk in enumerate(chunks):
+            closed = tracker.feed(chunk)
+            fields.extend(tracker.take_fields())
+            if closed:
+                closed_at = i
+                break
+        return tracker, fields, closed_at
+
+    def test_random_chunk_sizes(self):
+        rng = random.Random(1234)
+        for _ in range(200):
+            chunks = random_chunks(STREAMED_TEXT, rng)
+            tracker, fields, closed_at = self.feed_all(chunks)
+
+            self.assertEqual(fields, STREAMED_FIELDS)
+            self.assertTrue(tracker.closed)
+            self.assertEqual(closed_at, len(chunks) - 1)
+
+    def test_every_split_point(self):
+        # Covers boundaries between a backslash and the character it escapes, and inside \u escapes
+        for i in range(len(STREAMED_TEXT) + 1):
+            tracker, fields, closed_at = self.feed_all([STREAMED_TEXT[:i], STREAMED_TEXT[i:]])
+
+            self.assertEqual(fields, STREAMED_FIELDS, f"split at {i}")
+            self.assertTrue(tracker.closed)
+
+    def test_fields_reported_as_they_complete(self):
+        tracker = JSONObjectTracker(capture_fields=True)
+        self.assertFalse(tracker.feed('{"title": "Quake'))
+        self.assertEqual(tracker.take_fields(), [])
+        self.assertFalse(tracker.feed(' map", "body": "<p>'))
+        self.assertEqual(tracker.take_fields(), [("title", "Quake map")])
+        self.assertEqual(tracker.take_fields(), [])
+        self.assertTrue(tracker.feed('</p>"}'))
+        self.assertEqual(tracker.take_fields(), [("body", "<p></p>")])
+
+    def test_stops_when_object_closes(self):
+        tracker = JSONObjectTracker(capture_fields=True)
+        self.assertTrue(tracker.feed('Sure: ' + '{"a": "}"} then {"b": "c"}'))
+        self.assertEqual(tracker.take_fields(), [("a", "}")])
+        self.assertTrue(tracker.feed('{"d": "e"}'))
+        self.assertEqual(tracker.take_fields(), [])
+
+    def test_without_capture(self):
+        tracker = JSONObjectTracker()
+        self.assertFalse(tracker.feed(STREAMED_TEXT[:-1]))
+        self.assertTrue(tracker.feed(STREAMED_TEXT[-1]))
+        self.assertEqual(tracker.take_fields(), [])
+
+
+class ExtractJSONTest(TestCase):
+    def test_plain(self):
+        self.assertEqual(extract_json(STREAMED_TEXT), STREAMED_REPLY)
+
+    def test_fenced(self):
+        self.assertEqual(extract_json(f"```json\n{STREAMED_TEXT}\n```"), STREAMED_REPLY)
+
+    def test_leading_prose(self):
+        text = f"Here is the page you asked for:\n{STREAMED_TEXT}\nLet me know if {{anything}} changes."
+        self.assertEqual(extract_json(text), STREAMED_REPLY)
+
+    def test_invalid(self):
+        for text in ('no json here', '{"title": "unterminated', '{"a": 1,}'):
+            with self.assertRaises(json.JSONDecodeError):
+                extract_json(text)
+
+
+class StreamedCompletionTest(TestCase):
+    def setUp(self):
+        completion_memo.clear()
+        self.agent = make_agent('streamed')
+        self.streams = []
+        self.agent.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=self.create)))
+
+    def create(self, **kwargs):
+        self.assertTrue(kwargs['stream'])
+        chunks = random_chunks(STREAMED_TEXT, random.Random(len(self.streams)))
+        # Anything after the object must not be read
+        stream = FakeStream(chunks + ['\n', 'trailing text'])
+        self.streams.append(stream)
+        return stream
+
+    def test_on_field_and_cutoff(self):
+        fields = []
+        content = self.agent._stream_json_completion(
+            'system', 'user', 0.7, 100, 'gpt-4o-mini', on_field=lambda *field: fields.append(field)
+        )
+
+        self.assertEqual(extract_json(content), STREAMED_REPLY)
+        self.assertEqual(fields, STREAMED_FIELDS)
+        stream = self.streams[0]
+        self.assertTrue(stream.closed)
+        self.assertEqual(stream.consumed, len(stream.chunks) - 2)
+
+    def test_cache_hit_replays_fields_without_a_call(self):
+        calls = []
+        for _ in range(2):
+            fields = []
+            content = self.agent._cached_completion(
+                'system', 'user', 0.7, 100, on_field=lambda *field: fields.append(field)
+            )
+            calls.append(fields)
+            self.assertEqual(extract_json(content), STREAMED_REPLY)
+
+        self.assertEqual(calls, [STREAMED_FIELDS, STREAMED_FIELDS])
+        self.assertEqual(len(self.streams), 1)
+        self.assertEqual(self.agent.llm_calls_made, 1)
+
+    def test_on_partial_receives_final_page_fields(self):
+        fields = []
+        agent = make_agent('partial')
+        agent.on_partial = lambda *field: fields.append(field)
+        agent.client = self.agent.client
+        with mock.patch.object(ReactAgent, '_validate_generated_urls', return_value={}), \
+             mock.patch.object(ReactAgent, '_validate_and_fix_html', return_value={}):
+            result = agent._generate_final_html()
+
+        self.assertTrue(result["success"], result)
+        self.assertEqual(fields, STREAMED_FIELDS)
+        self.assertEqual(result["llm_calls_made"], 1)
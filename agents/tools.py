@@ -1,21 +1,75 @@
 from abc import ABC, abstractmethod
 from typing import Dict, Any, List, Optional
+import hashlib
 import json
 import requests
+from requests.adapters import HTTPAdapter
 from django.conf import settings
+from django.core.cache import cache
 import logging
+from collections import OrderedDict
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import re
+import threading
+import time
 from urllib.parse import urlparse
 
 logger = logging.getLogger(__name__)
 
+# Shared by all tools so back-to-back calls to the same hosts reuse keep-alive connections.
+# requests keeps only 10 idle connections per host by default, fewer than parallel tools plus
+# concurrent endpoint checks can have open, and any overflow is closed instead of reused.
+HTTP_POOL_CONNECTIONS = 32  # hosts with pooled connections
+HTTP_POOL_MAXSIZE = 32  # idle connections kept per host
+http_session = requests.Session()
+_http_adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE)
+http_session.mount('https://', _http_adapter)
+http_session.mount('http://', _http_adapter)
+
+# Recent endpoint check results shared by every agent in the process, least recently used first:
+# "METHOD url" -> (checked_at, result). Generated pages keep hitting the same handful of APIs,
+# so repeat checks are served from here, or from the Django cache when another worker made them.
+url_check_cache = OrderedDict()
+url_check_cache_lock = threading.Lock()
+URL_CHECK_CACHE_MAX_ENTRIES = 10000
+
+# Patterns for API URLs in generated HTML/JavaScript, compiled once at import
+URL_EXTRACTION_PATTERNS = [
+    (pattern, re.compile(pattern, re.IGNORECASE | re.MULTILINE))
+    for pattern in (
+        # fetch() calls
+        r"fetch\s*\(\s*['\"]([^'\"]+)['\"]",
+        r"fetch\s*\(\s*`([^`]+)`",
+        r"fetch\s*\(\s*([a-zA-Z_$][a-zA-Z0-9_$]*(?:\s*\+\s*['\"`][^'\"`]*['\"`])*)",
+        
+        # axios calls
+        r"axios\.get\s*\(\s*['\"]([^'\"]+)['\"]",
+        r"axios\.post\s*\(\s*['\"]([^'\"]+)['\"]",
+        r"axios\(\s*['\"]([^'\"]+)['\"]",
+        
+        # XMLHttpRequest
+        r"\.open\s*\(\s*['\"][^'\"]*['\"],\s*['\"]([^'\"]+)['\"]",
+        
+        # Direct URL assignments
+        r"(?:const|let|var)\s+\w+\s*=\s*['\"]([^'\"]*(?:api|search|endpoint)[^'\"]*)['\"]",
+        
+        # STAC specific patterns
+        r"['\"]([^'\"]*stac[^'\"]*search[^'\"]*)['\"]",
+        r"['\"]([^'\"]*search[^'\"]*collections[^'\"]*)['\"]"
+    )
+]
+
 
 class AgentTool(ABC):
     """Base class for all agent tools"""
     
+    # Read-only tools whose results can be reused for identical parameters for a short while
+    cacheable = False
+    
     def __init__(self):
         self.timeout = settings.AGENT_TOOL_TIMEOUT
+        self.http = http_session
     
     @property
     @abstractmethod
@@ -56,6 +110,8 @@ class AgentTool(ABC):
 class WebSearchTool(AgentTool):
     """Tool for searching the web for current information using DuckDuckGo"""
     
+    cacheable = True
+    
     @property
     def name(self) -> str:
         return "web_search"
@@ -136,6 +192,8 @@ class WebSearchTool(AgentTool):
 class ValidateAPITool(AgentTool):
     """Tool for validating API endpoints and checking data availability"""
     
+    cacheable = True
+    
     @property
     def name(self) -> str:
         return "validate_api_endpoint"
@@ -161,7 +219,7 @@ class ValidateAPITool(AgentTool):
     def execute(self, url: str, method: str = "GET") -> Dict[str, Any]:
         """Validate API endpoint"""
         try:
-            response = requests.request(
+            response = self.http.request(
                 method=method,
                 url=url,
                 timeout=self.timeout,
@@ -232,6 +290,8 @@ class ValidateAPITool(AgentTool):
 class FetchSTACDataTool(AgentTool):
     """Tool for fetching sample data from STAC catalogs"""
     
+    cacheable = True
+    
     @property
     def name(self) -> str:
         return "fetch_stac_sample_data"
@@ -299,7 +359,7 @@ class FetchSTACDataTool(AgentTool):
                 params["bbox"] = ",".join(map(str, bbox))
             
             # Make STAC search request
-            response = requests.get(
+            response = self.http.get(
                 search_url,
                 params=params,
                 timeout=self.timeout,
@@ -345,6 +405,9 @@ class FetchSTACDataTool(AgentTool):
 class ValidateHTMLEndpointsTool(AgentTool):
     """Tool for validating API endpoints in generated HTML content"""
     
+    # Upper bound on simultaneous HEAD requests for one page
+    max_concurrent_checks = 10
+    
     @property
     def name(self) -> str:
         return "validate_html_endpoints"
@@ -364,17 +427,24 @@ class ValidateHTMLEndpointsTool(AgentTool):
                 "type": "string",
                 "description": "JavaScript content with API calls to validate (optional)",
                 "default": ""
+            },
+            "urls": {
+                "type": "array",
+                "description": "URL entries already returned by extract_urls; skips re-scanning the content (optional)",
+                "default": None
             }
         }
     
-    def execute(self, html_content: str, js_content: str = "") -> Dict[str, Any]:
+    def execute(self, html_content: str = "", js_content: str = "",
+                urls: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
         """Extract and validate all API endpoints in HTML/JS content"""
         try:
-            # Combine HTML and JS content for analysis
-            all_content = html_content + "\n" + js_content
-            
-            # Extract URLs from various JavaScript patterns
-            urls = self._extract_urls_from_content(all_content)
+            if urls is None:
+                # Extract URLs from various JavaScript patterns in the combined HTML and JS
+                urls = self.extract_urls(html_content + "\n" + js_content)
+            else:
+                # Copy the entries so validation details don't leak into the caller's list
+                urls = [dict(url_info) for url_info in urls]
             
             if not urls:
                 return {
@@ -385,12 +455,14 @@ class ValidateHTMLEndpointsTool(AgentTool):
                     "message": "No API endpoints found in content"
                 }
             
-            # Validate each URL
+            # Validate each URL - checks are network-bound, so run them concurrently
             valid_urls = []
             invalid_urls = []
             
-            for url_info in urls:
-                validation_result = self._validate_single_url(url_info["url"])
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrent_checks, len(urls))) as executor:
+                results = list(executor.map(self._check_url, [url_info["url"] for url_info in urls]))
+            
+            for url_info, validation_result in zip(urls, results):
                 url_info.update(validation_result)
                 
                 if validation_result["is_accessible"]:
@@ -413,36 +485,12 @@ class ValidateHTMLEndpointsTool(AgentTool):
                 "error": str(e)
             }
     
-    def _extract_urls_from_content(self, content: str) -> List[Dict[str, Any]]:
+    def extract_urls(self, content: str) -> List[Dict[str, Any]]:
         """Extract API URLs from HTML/JavaScript content"""
         urls = []
         
-        # Patterns to match various JavaScript API call formats
-        patterns = [
-            # fetch() calls
-            r"fetch\s*\(\s*['\"]([^'\"]+)['\"]",
-            r"fetch\s*\(\s*`([^`]+)`",
-            r"fetch\s*\(\s*([a-zA-Z_$][a-zA-Z0-9_$]*(?:\s*\+\s*['\"`][^'\"`]*['\"`])*)",
-            
-            # axios calls
-            r"axios\.get\s*\(\s*['\"]([^'\"]+)['\"]",
-            r"axios\.post\s*\(\s*['\"]([^'\"]+)['\"]",
-            r"axios\(\s*['\"]([^'\"]+)['\"]",
-            
-            # XMLHttpRequest
-            r"\.open\s*\(\s*['\"][^'\"]*['\"],\s*['\"]([^'\"]+)['\"]",
-            
-            # Direct URL assignments
-            r"(?:const|let|var)\s+\w+\s*=\s*['\"]([^'\"]*(?:api|search|endpoint)[^'\"]*)['\"]",
-            
-            # STAC specific patterns
-            r"['\"]([^'\"]*stac[^'\"]*search[^'\"]*)['\"]",
-            r"['\"]([^'\"]*search[^'\"]*collections[^'\"]*)['\"]"
-        ]
-        
-        for pattern in patterns:
-            matches = re.finditer(pattern, content, re.IGNORECASE | re.MULTILINE)
-            for match in matches:
+        for pattern, compiled in URL_EXTRACTION_PATTERNS:
+            for match in compiled.finditer(content):
                 url = match.group(1).strip()
                 
                 # Skip obvious non-URLs
@@ -482,6 +530,38 @@ class ValidateHTMLEndpointsTool(AgentTool):
         api_indicators = ['api', 'search', 'endpoint', 'data', 'service', 'stac']
         return any(indicator in text.lower() for indicator in api_indicators)
     
+    def _check_url(self, url: str) -> Dict[str, Any]:
+        """
+        Validate a URL, reusing a result from the last AGENT_URL_CHECK_CACHE_SECONDS from this
+        process or, through the Django cache, from any worker
+        """
+        ttl = getattr(settings, 'AGENT_URL_CHECK_CACHE_SECONDS', 600)
+        if ttl <= 0:
+            return self._validate_single_url(url)
+        
+        key = f"HEAD {url}"
+        now = time.time()
+        with url_check_cache_lock:
+            cached = url_check_cache.get(key)
+            if cached and now - cached[0] < ttl:
+                url_check_cache.move_to_end(key)
+                return cached[1]
+        
+        shared_key = f"agent:url_check:{hashlib.sha1(key.encode()).hexdigest()}"
+        cached = cache.get(shared_key)
+        if cached and now - cached[0] < ttl:
+            checked_at, result = cached
+        else:
+            checked_at, result = now, self._validate_single_url(url)
+            cache.set(shared_key, (checked_at, result), ttl)
+        
+        with url_check_cache_lock:
+            url_check_cache[key] = (checked_at, result)
+            url_check_cache.move_to_end(key)
+            while len(url_check_cache) > URL_CHECK_CACHE_MAX_ENTRIES:
+                url_check_cache.popitem(last=False)
+        return result
+    
     def _validate_single_url(self, url: str) -> Dict[str, Any]:
         """Validate a single URL"""
         try:
@@ -507,7 +587,7 @@ class ValidateHTMLEndpointsTool(AgentTool):
             
             # Make request with timeout
             start_time = datetime.now()
-            response = requests.head(  # Use HEAD to avoid downloading content
+            response = self.http.head(  # Use HEAD to avoid downloading content
                 url,
                 timeout=self.timeout,
                 headers={'User-Agent': 'LL-HTML URL Validator/1.0'},
@@ -564,6 +644,8 @@ class ToolRegistry:
     
     def __init__(self):
         self.tools = {}
+        self.http_session = http_session
+        self._tools_description = None
         self._register_default_tools()
     
     def _register_default_tools(self):
@@ -580,6 +662,7 @@ class ToolRegistry:
     def register_tool(self, tool: AgentTool):
         """Register a tool"""
         self.tools[tool.name] = tool
+        self._tools_description = None
     
     def get_tool(self, name: str) -> Optional[AgentTool]:
         """Get a tool by name"""
@@ -589,6 +672,14 @@ class ToolRegistry:
         """Get all available tools"""
         return self.tools.copy()
     
+    def get_tools_description(self) -> str:
+        """Get a prompt-ready list of tool names and descriptions, cached until tools change"""
+        if self._tools_description is None:
+            self._tools_description = "\n".join(
+                f"- {tool_name}: {tool.description}" for tool_name, tool in self.tools.items()
+            )
+        return self._tools_description
+    
     def get_tool_definitions(self) -> List[Dict[str, Any]]:
         """Get OpenAI function calling format definitions for all tools"""
         return [tool.get_tool_definition() for tool in self.tools.values()]
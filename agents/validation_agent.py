@@ -1,18 +1,12 @@
 """
 Validation Agent for HTML/JavaScript quality assurance
 """
-import json
 import logging
 from typing import Dict, List, Any, Optional
 from django.conf import settings
 from .validation_tools import ValidationOrchestrator
-
-# OpenAI import handling
-try:
-    from openai import OpenAI
-    openai_available = True
-except ImportError:
-    openai_available = False
+from .json_utils import dumps, extract_json
+from .services import EMPTY_HTML_CONTENT, get_openai_client
 
 logger = logging.getLogger(__name__)
 
@@ -21,9 +15,7 @@ class ValidationAgent:
     """Agent that validates and fixes generated HTML/JavaScript content"""
     
     def __init__(self):
-        self.client = None
-        if openai_available and settings.OPENAI_API_KEY:
-            self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.client = get_openai_client()
         
         self.validator = ValidationOrchestrator()
         self.max_fix_attempts = 2
@@ -146,7 +138,7 @@ class ValidationAgent:
         {issues_context}
 
         CURRENT CONTENT:
-        {json.dumps(html_content, indent=2)}
+        {dumps(html_content)}
 
         Please fix these specific issues while keeping everything else exactly the same. Focus on the most critical issues first.
         """
@@ -164,21 +156,11 @@ class ValidationAgent:
             
             content = response.choices[0].message.content.strip()
             
-            # Clean JSON from markdown if present
-            if content.startswith('```json'):
-                content = content.replace('```json', '').replace('```', '').strip()
-            elif content.startswith('```'):
-                content = content.replace('```', '').strip()
-            
-            fixed_content = json.loads(content)
-            
-            # Validate that we still have the required structure
-            required_fields = ['title', 'description', 'main_content', 'custom_css', 'custom_js']
-            for field in required_fields:
-                if field not in fixed_content:
-                    fixed_content[field] = html_content.get(field, "")
+            fixed_content = extract_json(content)
             
-            return fixed_content
+            # Keep the required structure, falling back to the original fields
+            required_content = {field: html_content.get(field, default) for field, default in EMPTY_HTML_CONTENT.items()}
+            return {**required_content, **fixed_content}
             
         except Exception as e:
             logger.error(f"Fix generation failed: {e}")
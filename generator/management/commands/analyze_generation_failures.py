@@ -1,6 +1,6 @@
 from django.core.management.base import BaseCommand
 from generator.models import GeneratedPage, GenerationRequest
-from agents.models import AgentSession, AgentMessage
+from agents.models import AgentSession, AgentMessage, AgentToolResult
 import json
 import re
 from collections import Counter
@@ -92,12 +92,12 @@ class Command(BaseCommand):
                     
                     if agent_sessions:
                         session = agent_sessions[0]
-                        tool_results = session.context.get('tool_results', [])
-                        self.stdout.write(f"    Tools used: {len(tool_results)}")
+                        total_tools = session.tool_results.count()
+                        self.stdout.write(f"    Tools used: {total_tools}")
                         
                         # Count successful vs failed tools
-                        successful_tools = sum(1 for tr in tool_results if tr.get('result', {}).get('success', False))
-                        self.stdout.write(f"    Successful tool calls: {successful_tools}/{len(tool_results)}")
+                        successful_tools = session.tool_results.filter(success=True).count()
+                        self.stdout.write(f"    Successful tool calls: {successful_tools}/{total_tools}")
                         
             except Exception as e:
                 self.stdout.write(f"    Could not analyze agent session: {e}")
@@ -149,26 +149,22 @@ class Command(BaseCommand):
         self.stdout.write('=' * 60)
         
         # Get recent agent sessions
-        sessions = AgentSession.objects.all().order_by('-created_at')[:count]
+        sessions = AgentSession.objects.order_by('-created_at').values_list('pk', flat=True)[:count]
+        tool_results = AgentToolResult.objects.filter(session__in=list(sessions)).values_list('action', 'success', 'result')
         
         tool_error_patterns = Counter()
         tool_success_rates = Counter()
         
-        for session in sessions:
-            tool_results = session.context.get('tool_results', [])
+        for action, success, result in tool_results.iterator():
+            tool_name = (action or {}).get('action', 'unknown')
             
-            for tool_result in tool_results:
-                action = tool_result.get('action', {})
-                result = tool_result.get('result', {})
-                tool_name = action.get('action', 'unknown')
-                
-                # Track success rates
-                if result.get('success', False):
-                    tool_success_rates[f"{tool_name}_success"] += 1
-                else:
-                    tool_success_rates[f"{tool_name}_failure"] += 1
-                    error = result.get('error', 'Unknown error')
-                    tool_error_patterns[f"{tool_name}: {error[:50]}"] += 1
+            # Track success rates
+            if success:
+                tool_success_rates[f"{tool_name}_success"] += 1
+            else:
+                tool_success_rates[f"{tool_name}_failure"] += 1
+                error = result.get('error', 'Unknown error')
+                tool_error_patterns[f"{tool_name}: {error[:50]}"] += 1
         
         self.stdout.write("\n📊 TOOL SUCCESS RATES:")
         tools = set()
@@ -110,28 +110,27 @@ class Command(BaseCommand):
             context_keys = list(session.context.keys()) if isinstance(session.context, dict) else []
             self.stdout.write(f'Context keys: {context_keys}')
             
-            # Check for tool results in context
-            if isinstance(session.context, dict) and 'tool_results' in session.context:
-                tool_results = session.context['tool_results']
-                if isinstance(tool_results, list):
-                    self.stdout.write(f'Tool results count: {len(tool_results)}')
+            # Check for tool results recorded for the session
+            tool_results = list(session.tool_results.order_by('idx'))
+            if tool_results:
+                self.stdout.write(f'Tool results count: {len(tool_results)}')
+                
+                for i, result in enumerate(tool_results[:5], 1):  # Show first 5 tool results
+                    action = result.action if isinstance(result.action, dict) else {}
+                    tool_result = result.result
                     
-                    for i, result in enumerate(tool_results[:5], 1):  # Show first 5 tool results
-                        action = result.get('action', {}) if isinstance(result, dict) else {}
-                        tool_result = result.get('result', {}) if isinstance(result, dict) else {}
-                        
-                        tool_name = action.get('action', 'unknown')
-                        success = tool_result.get('success', False) if isinstance(tool_result, dict) else False
-                        
-                        self.stdout.write(f'  {i}. {tool_name}: {"✅" if success else "❌"}')
-                        
-                        if isinstance(tool_result, dict):
-                            if 'error' in tool_result:
-                                self.stdout.write(f'     Error: {tool_result["error"]}')
-                            if 'results' in tool_result and isinstance(tool_result['results'], list):
-                                self.stdout.write(f'     Results: {len(tool_result["results"])} items')
-                            if 'base_url' in tool_result:
-                                self.stdout.write(f'     Base URL: {tool_result["base_url"]}')
+                    tool_name = action.get('action', 'unknown')
+                    success = result.success
+                    
+                    self.stdout.write(f'  {i}. {tool_name}: {"✅" if success else "❌"}')
+                    
+                    if isinstance(tool_result, dict):
+                        if 'error' in tool_result:
+                            self.stdout.write(f'     Error: {tool_result["error"]}')
+                        if 'results' in tool_result and isinstance(tool_result['results'], list):
+                            self.stdout.write(f'     Results: {len(tool_result["results"])} items')
+                        if 'base_url' in tool_result:
+                            self.stdout.write(f'     Base URL: {tool_result["base_url"]}')
         
         # Show messages from the session
         messages = session.messages.all()
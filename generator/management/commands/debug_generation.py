@@ -32,7 +32,7 @@ class Command(BaseCommand):
         self.stdout.write('=' * 60)
         
         try:
-            agent = ReactAgent()
+            agent = ReactAgent(on_partial=self.report_streamed_field)
             result = agent.execute("Create a simple map showing earthquake locations using Montandon data")
             
             self.stdout.write(f"Generation result:")
@@ -67,6 +67,9 @@ class Command(BaseCommand):
             self.stdout.write(f"❌ Generation test failed: {e}")
             traceback.print_exc()
 
+    def report_streamed_field(self, field, value):
+        self.stdout.write(f"  Streamed {field}: {len(value)} chars")
+
     def analyze_recent_failures(self):
         self.stdout.write(self.style.SUCCESS('ANALYZING RECENT GENERATIONS:'))
         self.stdout.write('=' * 60)
@@ -57,14 +57,17 @@ class Command(BaseCommand):
         self.stdout.write(f"\n📊 CONTEXT SUMMARY:")
         self.stdout.write(f"  Keys: {list(context.keys())}")
         
-        tool_results = context.get('tool_results', [])
-        self.stdout.write(f"  Tool results: {len(tool_results)}")
+        # Raw tool results live in AgentToolResult; the context only keeps summaries
+        tool_results = session.tool_results.order_by('idx')
+        total_tools = tool_results.count()
+        self.stdout.write(f"  Tool results: {total_tools}")
         
-        successful_tools = sum(1 for tr in tool_results if tr.get('result', {}).get('success', False))
-        self.stdout.write(f"  Successful tools: {successful_tools}/{len(tool_results)}")
+        successful_tools = tool_results.filter(success=True).count()
+        self.stdout.write(f"  Successful tools: {successful_tools}/{total_tools}")
         
-        reasoning_steps = context.get('reasoning_steps', [])
-        self.stdout.write(f"  Reasoning steps: {len(reasoning_steps)}")
+        # Older sessions predate the AgentReasoningStep archive and only have the context list
+        reasoning_steps = session.reasoning_steps.count() or len(context.get('reasoning_steps', []))
+        self.stdout.write(f"  Reasoning steps: {reasoning_steps}")
         
         # Messages analysis
         messages = AgentMessage.objects.filter(session=session).order_by('timestamp')
@@ -78,7 +81,7 @@ class Command(BaseCommand):
             self.stdout.write(f"  {msg_type}: {count}")
         
         if options['show_tool_results']:
-            self.show_tool_results(context.get('tool_results', []))
+            self.show_tool_results(tool_results)
         
         if options['show_llm_responses'] or options['analyze_json_issues']:
             self.analyze_llm_responses(session, options['analyze_json_issues'])
@@ -91,9 +94,9 @@ class Command(BaseCommand):
         self.stdout.write('-' * 40)
         
         for i, tool_result in enumerate(tool_results, 1):
-            action = tool_result.get('action', {})
-            result = tool_result.get('result', {})
-            timestamp = tool_result.get('timestamp', 'Unknown')
+            action = tool_result.action or {}
+            result = tool_result.result or {}
+            timestamp = tool_result.created_at
             
             tool_name = action.get('action', 'Unknown')
             parameters = action.get('parameters', {})
@@ -221,7 +224,7 @@ class Command(BaseCommand):
                     self.stdout.write(f"      Error character: '{error_char}' (ASCII {ord(error_char)})")
         
         # Check if it's wrapped in markdown
-        if content.strip().startswith('```json') or content.strip().startswith('```'):
+        if content.lstrip().startswith('```'):
             self.stdout.write(f"   📝 Content wrapped in markdown - this might need cleaning")
 
     def show_all_messages(self, messages):
@@ -163,11 +163,11 @@ class Command(BaseCommand):
                         self.stdout.write(f"    Created: {session.created_at}")
                         
                         # Show tool results
-                        tool_results = session.context.get('tool_results', [])
-                        self.stdout.write(f"    Tool calls: {len(tool_results)}")
+                        total_tools = session.tool_results.count()
+                        self.stdout.write(f"    Tool calls: {total_tools}")
                         
-                        successful_tools = sum(1 for tr in tool_results if tr.get('result', {}).get('success', False))
-                        self.stdout.write(f"    Successful: {successful_tools}/{len(tool_results)}")
+                        successful_tools = session.tool_results.filter(success=True).count()
+                        self.stdout.write(f"    Successful: {successful_tools}/{total_tools}")
                         
                         # Show messages
                         messages = AgentMessage.objects.filter(session=session).count()
@@ -38,8 +38,8 @@ class Command(BaseCommand):
             
             # Test just the planning step first
             self.stdout.write("🎯 STEP 1: Creating Implementation Plan...")
-            planning_result = agent._create_implementation_plan()
             agent.context['user_request'] = test_request
+            planning_result = agent._create_implementation_plan()
             
             if planning_result.get('success'):
                 plan = planning_result['plan']
@@ -84,12 +84,12 @@ class Command(BaseCommand):
                         self.stdout.write("✅ Full execution successful!")
                         
                         # Show research phase details
-                        context = agent_full.context
-                        tool_results = context.get('tool_results', [])
-                        self.stdout.write(f"   Tool calls made: {len(tool_results)}")
+                        tool_results = agent_full.session.tool_results
+                        total_tools = tool_results.count()
+                        self.stdout.write(f"   Tool calls made: {total_tools}")
                         
-                        successful_tools = sum(1 for tr in tool_results if tr.get('result', {}).get('success', False))
-                        self.stdout.write(f"   Successful tools: {successful_tools}/{len(tool_results)}")
+                        successful_tools = tool_results.filter(success=True).count()
+                        self.stdout.write(f"   Successful tools: {successful_tools}/{total_tools}")
                         
                         # Show which research tasks were completed
                         plan_tasks = plan.get('research_tasks', [])
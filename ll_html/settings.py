@@ -94,6 +94,30 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Agent prompt contexts, tool results and endpoint checks are shared through this cache, so it must
+# be visible to every worker process: Redis when REDIS_URL is set (needs the redis package),
+# otherwise files on local disk, which all gunicorn workers on one host share.
+
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': config('CACHE_DIR', default=str(BASE_DIR / 'cache')),
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -151,6 +175,8 @@ REST_FRAMEWORK = {
 
 # LLM Configuration
 OPENAI_API_KEY = config('OPENAI_API_KEY', default='')
+OPENAI_KEEPALIVE_SECONDS = config('OPENAI_KEEPALIVE_SECONDS', default=60, cast=int)  # Idle LLM connections kept open between calls
+OPENAI_MAX_RETRIES = config('OPENAI_MAX_RETRIES', default=3, cast=int)  # Backoff retries on 429/5xx/connection errors
 ANTHROPIC_API_KEY = config('ANTHROPIC_API_KEY', default='')
 
 # HTML Generation Settings
@@ -163,10 +189,21 @@ AGENT_MAX_LLM_CALLS = config('AGENT_MAX_LLM_CALLS', default=15, cast=int)    # I
 AGENT_TOOL_TIMEOUT = config('AGENT_TOOL_TIMEOUT', default=60, cast=int)      # Increased from 30
 AGENT_ENABLE_WEB_SEARCH = config('AGENT_ENABLE_WEB_SEARCH', default=True, cast=bool)
 AGENT_ENABLE_API_VALIDATION = config('AGENT_ENABLE_API_VALIDATION', default=True, cast=bool)
+AGENT_FUSED_PLANNING = config('AGENT_FUSED_PLANNING', default=False, cast=bool)  # Plan + first action in one LLM call
+AGENT_SESSION_FLUSH_INTERVAL = config('AGENT_SESSION_FLUSH_INTERVAL', default=3, cast=int)  # Persist context every N iterations
+AGENT_STREAM_REASONING = config('AGENT_STREAM_REASONING', default=False, cast=bool)  # Start tools while the reply streams
+AGENT_MAX_PARALLEL_TOOLS = config('AGENT_MAX_PARALLEL_TOOLS', default=4, cast=int)  # Tool calls run concurrently per iteration
+AGENT_PLAN_CACHE_DAYS = config('AGENT_PLAN_CACHE_DAYS', default=7, cast=int)  # Reuse plans for repeated requests, 0 disables
+AGENT_CONTEXT_WINDOW = config('AGENT_CONTEXT_WINDOW', default=10, cast=int)  # Recent tool results/reasoning steps kept in session context
+AGENT_COMPLETION_CACHE_HOURS = config('AGENT_COMPLETION_CACHE_HOURS', default=24, cast=int)  # Reuse identical LLM completions, 0 disables
+AGENT_URL_CHECK_CACHE_SECONDS = config('AGENT_URL_CHECK_CACHE_SECONDS', default=600, cast=int)  # Reuse endpoint check results, 0 disables
+AGENT_FAST_PATH = config('AGENT_FAST_PATH', default=True, cast=bool)  # Skip the first reasoning call when the plan names STAC collections
+AGENT_TOOL_CACHE_SECONDS = config('AGENT_TOOL_CACHE_SECONDS', default=300, cast=int)  # Share read-only tool results across sessions, 0 disables
 
 # LLM Token Configuration
 AGENT_MAX_TOKENS_FINAL_GENERATION = config('AGENT_MAX_TOKENS_FINAL_GENERATION', default=6000, cast=int)  # Increased from 4000
-AGENT_MAX_TOKENS_REASONING = config('AGENT_MAX_TOKENS_REASONING', default=2000, cast=int)               # For reasoning steps
+AGENT_MAX_TOKENS_REASONING = config('AGENT_MAX_TOKENS_REASONING', default=600, cast=int)                # Reasoning replies are ~100-300 tokens
+AGENT_MAX_CONTEXT_TOKENS = config('AGENT_MAX_CONTEXT_TOKENS', default=6000, cast=int)                 # Research findings budget in the final prompt
 
 # Django Allauth Configuration
 AUTHENTICATION_BACKENDS = (